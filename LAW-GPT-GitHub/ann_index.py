@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+LAW-GPT 2.0 - Approximate Nearest Neighbour Index
+Pure-NumPy IVF-PQ (inverted file + product quantization) for large corpora
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from ranking import select_top_k
+
+ANN_FORMAT_VERSION = 1
+KMEANS_CHUNK = 4096
+
+
+def _assign(vectors, centroids):
+    """Index of the nearest centroid (squared L2) for every vector"""
+    centroid_norms = (centroids ** 2).sum(axis=1)
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), KMEANS_CHUNK):
+        chunk = vectors[start:start + KMEANS_CHUNK]
+        distances = centroid_norms - 2.0 * (chunk @ centroids.T)
+        labels[start:start + KMEANS_CHUNK] = distances.argmin(axis=1)
+    return labels
+
+
+def kmeans(vectors, n_clusters, n_iter=20, seed=0):
+    """Lloyd's k-means with random initialization; returns float32 centroids"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    n_clusters = min(n_clusters, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+
+    for _ in range(n_iter):
+        labels = _assign(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        counts = np.bincount(labels, minlength=n_clusters)
+
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        # Re-seed empty clusters with random points
+        if empty.any():
+            centroids[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+    return centroids
+
+
+def default_subvectors(dimension):
+    """Largest divisor of the dimension giving sub-vectors of at least 8 dims"""
+    for n_subvectors in range(max(dimension // 8, 1), 0, -1):
+        if dimension % n_subvectors == 0:
+            return n_subvectors
+    return 1
+
+
+class IVFPQIndex:
+    """Inverted lists over coarse centroids with PQ-encoded residuals
+
+    Queries probe the ``nprobe`` closest lists and score their members from
+    PQ codes with a lookup table; the best ``rerank`` candidates can then be
+    re-scored exactly from the (memory-mapped) embedding matrix. Raising
+    ``nprobe`` or ``rerank`` trades latency for recall.
+    """
+
+    def __init__(self, centroids, codebooks, list_offsets, list_ids, list_codes,
+                 documents=None, embeddings=None, nprobe=8, rerank=100):
+        self.centroids = centroids
+        self.codebooks = codebooks
+        self.list_offsets = list_offsets
+        self.list_ids = list_ids
+        self.list_codes = list_codes
+        self.documents = documents
+        self.embeddings = embeddings
+        self.nprobe = nprobe
+        self.rerank = rerank
+        # doc id -> position in the inverted lists, for scoring known ids
+        self.positions = np.empty(len(list_ids), dtype=np.int64)
+        self.positions[list_ids] = np.arange(len(list_ids))
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    @property
+    def n_subvectors(self):
+        return len(self.codebooks)
+
+    @classmethod
+    def build(cls, embeddings, documents=None, n_lists=None, n_subvectors=None,
+              n_iter=20, train_size=65536, seed=0, nprobe=8, rerank=100):
+        """Train coarse and PQ codebooks, then encode every embedding"""
+        embeddings_array = np.asarray(embeddings, dtype=np.float32)
+        n_docs, dimension = embeddings_array.shape
+        n_lists = n_lists or max(1, int(4 * np.sqrt(n_docs)))
+        n_subvectors = n_subvectors or default_subvectors(dimension)
+        if dimension % n_subvectors:
+            raise ValueError(f"dimension {dimension} is not divisible by {n_subvectors} sub-vectors")
+
+        rng = np.random.default_rng(seed)
+        sample = embeddings_array
+        if n_docs > train_size:
+            sample = embeddings_array[np.sort(rng.choice(n_docs, train_size, replace=False))]
+
+        centroids = kmeans(sample, n_lists, n_iter=n_iter, seed=seed)
+        labels = _assign(embeddings_array, centroids)
+        residuals = embeddings_array - centroids[labels]
+
+        # Product quantizer over the residuals, shared by all lists
+        sub_dim = dimension // n_subvectors
+        n_codes = min(256, n_docs)
+        sample_residuals = residuals if n_docs <= train_size else sample - centroids[_assign(sample, centroids)]
+        codebooks = np.empty((n_subvectors, n_codes, sub_dim), dtype=np.float32)
+        codes = np.empty((n_docs, n_subvectors), dtype=np.uint8)
+        for j in range(n_subvectors):
+            part = slice(j * sub_dim, (j + 1) * sub_dim)
+            codebook = kmeans(sample_residuals[:, part], n_codes, n_iter=n_iter, seed=seed + j + 1)
+            codebooks[j, :len(codebook)] = codebook
+            codebooks[j, len(codebook):] = 0.0
+            codes[:, j] = _assign(residuals[:, part], codebook)
+
+        order = np.argsort(labels, kind="stable")
+        list_offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=len(centroids)), out=list_offsets[1:])
+
+        return cls(centroids, codebooks, list_offsets, order.astype(np.int32), codes[order],
+                   documents=documents, embeddings=embeddings, nprobe=nprobe, rerank=rerank)
+
+    def _approximate(self, query_vector, positions, lists):
+        """PQ inner-product estimate for inverted-list positions"""
+        sub_dim = self.codebooks.shape[2]
+        # (n_subvectors, n_codes) table: query sub-vector . codeword
+        table = np.einsum("jkd,jd->jk", self.codebooks, query_vector.reshape(self.n_subvectors, sub_dim))
+        codes = self.list_codes[positions]
+        residual = table[np.arange(self.n_subvectors), codes].sum(axis=1)
+        return self.centroids[lists] @ query_vector + residual
+
+    def search_ids(self, query_vector, top_k=3, nprobe=None, rerank=None):
+        """Return (doc_ids, scores) of the approximate top-k"""
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+        rerank = self.rerank if rerank is None else rerank
+
+        coarse = self.centroids @ query_vector
+        probe, _ = select_top_k(np.arange(self.n_lists), coarse, nprobe)
+        starts, ends = self.list_offsets[probe], self.list_offsets[probe + 1]
+        sizes = ends - starts
+        if sizes.sum() == 0:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+
+        positions = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+        lists = np.repeat(probe, sizes)
+        doc_ids = self.list_ids[positions]
+        scores = self._approximate(query_vector, positions, lists).astype(np.float32)
+
+        if rerank and self.embeddings is not None:
+            doc_ids, _ = select_top_k(doc_ids, scores, max(rerank, top_k))
+            scores = self.score_ids(query_vector, doc_ids)
+        return select_top_k(doc_ids, scores, top_k)
+
+    def search_ids_batch(self, query_vectors, top_k=3):
+        """Approximate top-k for each query vector"""
+        results = [self.search_ids(query_vector, top_k) for query_vector in query_vectors]
+        return [ids for ids, _ in results], [scores for _, scores in results]
+
+    def score_ids(self, query_vector, doc_ids):
+        """Scores for specific documents, exact when embeddings are attached"""
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        if self.embeddings is not None:
+            order = np.argsort(doc_ids)
+            scores = np.empty(len(doc_ids), dtype=np.float32)
+            # Sorted row access keeps reads from the memory map sequential
+            scores[order] = np.asarray(self.embeddings[doc_ids[order]]) @ query_vector
+            return scores
+        positions = self.positions[doc_ids]
+        lists = np.searchsorted(self.list_offsets, positions, side="right") - 1
+        return self._approximate(query_vector, positions, lists).astype(np.float32)
+
+    def search(self, query_vector, top_k=3):
+        """Return the top (document, score) pairs for a query vector"""
+        doc_ids, scores = self.search_ids(query_vector, top_k)
+        return [(self.documents[doc_id], float(score)) for doc_id, score in zip(doc_ids, scores)]
+
+    def save(self, directory, fingerprint=""):
+        """Write the index as .npy arrays plus a JSON manifest
+
+        Files are written to a fresh directory that then replaces the old
+        one, so a live snapshot's memory-mapped arrays are never overwritten.
+        """
+        directory = Path(directory)
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f".{directory.name}.", dir=directory.parent))
+        try:
+            self._write(staging, fingerprint)
+            staging.chmod(0o755)
+            retired = None
+            if directory.exists():
+                retired = Path(tempfile.mkdtemp(prefix=f".{directory.name}.old.", dir=directory.parent))
+                os.replace(directory, retired / directory.name)
+            os.replace(staging, directory)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        if retired is not None:
+            # Unlinked files stay readable through existing memory maps
+            shutil.rmtree(retired, ignore_errors=True)
+
+    def _write(self, directory, fingerprint):
+        for name in ("centroids", "codebooks", "list_offsets", "list_ids", "list_codes"):
+            np.save(directory / f"{name}.npy", getattr(self, name))
+        # Written last: a directory without a manifest is never loaded
+        manifest = {
+            "format_version": ANN_FORMAT_VERSION,
+            "fingerprint": fingerprint,
+            "n_docs": int(len(self.list_ids)),
+            "n_lists": int(self.n_lists),
+            "n_subvectors": int(self.n_subvectors),
+        }
+        with open(directory / "manifest.json", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+    @classmethod
+    def load(cls, directory, documents=None, embeddings=None, fingerprint=None, nprobe=8, rerank=100):
+        """Memory-map a saved index; None if missing or built for other data"""
+        directory = Path(directory)
+        try:
+            with open(directory / "manifest.json", "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("format_version") != ANN_FORMAT_VERSION:
+                return None
+            if fingerprint is not None and manifest.get("fingerprint") != fingerprint:
+                return None
+            arrays = {
+                name: np.load(directory / f"{name}.npy", mmap_mode="r")
+                for name in ("centroids", "codebooks", "list_offsets", "list_ids", "list_codes")
+            }
+        except (OSError, ValueError):
+            return None
+        return cls(documents=documents, embeddings=embeddings, nprobe=nprobe, rerank=rerank, **arrays)
+
+
+def recall_at_k(index, embeddings, query_vectors, k=10, **search_options):
+    """Mean overlap between approximate and exact top-k over a query set"""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    hits = 0
+    for query_vector in query_vectors:
+        exact_scores = embeddings @ query_vector
+        exact, _ = select_top_k(np.arange(len(exact_scores)), exact_scores, k)
+        approximate, _ = index.search_ids(query_vector, k, **search_options)
+        hits += len(set(exact.tolist()) & set(approximate.tolist()))
+    return hits / (k * len(query_vectors))
+
+
+def main():
+    """Recall/latency check of IVF-PQ against exact search on synthetic data"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--docs", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    topics = rng.standard_normal((256, args.dim)).astype(np.float32)
+    embeddings = topics[rng.integers(0, len(topics), args.docs)]
+    embeddings += 0.5 * rng.standard_normal(embeddings.shape).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    queries = embeddings[rng.choice(args.docs, args.queries, replace=False)]
+    queries = queries + 0.1 * rng.standard_normal(queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    start = time.perf_counter()
+    index = IVFPQIndex.build(embeddings)
+    print(f"Built {index.n_lists} lists x {index.n_subvectors} sub-vectors in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    for query_vector in queries:
+        embeddings @ query_vector
+    exact_ms = 1000 * (time.perf_counter() - start) / len(queries)
+    print(f"exact: {exact_ms:.2f} ms/query")
+
+    for nprobe in (1, 4, 8, 16, 32):
+        for rerank in (0, 100):
+            start = time.perf_counter()
+            for query_vector in queries:
+                index.search_ids(query_vector, args.k, nprobe=nprobe, rerank=rerank)
+            elapsed_ms = 1000 * (time.perf_counter() - start) / len(queries)
+            recall = recall_at_k(index, embeddings, queries, args.k, nprobe=nprobe, rerank=rerank)
+            print(f"nprobe={nprobe:<3} rerank={rerank:<4} recall@{args.k}={recall:.3f}  {elapsed_ms:.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+LAW-GPT 2.0 - HTTP/JSON API Server
+Headless asyncio service with micro-batching and backpressure
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http import HTTPStatus
+from pathlib import Path
+
+# Add current directory to path
+sys.path.append(str(Path(__file__).parent))
+
+from high_accuracy_law_gpt import get_shared_engine
+
+MAX_BODY_BYTES = 1024 * 1024
+MAX_BATCH_QUERIES = 1000
+
+
+class MicroBatcher:
+    """Groups queries that arrive within a short window into one batch call"""
+
+    def __init__(self, engine, executor, window_ms=5.0, max_batch_size=32):
+        self.engine = engine
+        self.executor = executor
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.batched_queries = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, query):
+        """Queue a query and wait for its result"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((query, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            self.batches += 1
+            self.batched_queries += len(batch)
+            # Scoring runs in the worker pool; the loop only keeps collecting
+            loop.create_task(self._answer(batch))
+
+    async def _answer(self, batch):
+        queries = [query for query, _ in batch]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.engine.answer_legal_queries, queries
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+class LawGPTServer:
+    """Minimal HTTP/1.1 server exposing the LAW-GPT engine as JSON"""
+
+    def __init__(self, engine, workers=4, max_in_flight=64, batch_window_ms=5.0, max_batch_size=32):
+        self.engine = engine
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lawgpt-api")
+        self.batcher = MicroBatcher(engine, self.executor, batch_window_ms, max_batch_size)
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.requests = 0
+        self.rejected = 0
+        self.started_at = time.time()
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one connection until it closes"""
+        try:
+            while True:
+                request = await self.read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload, extra_headers = await self.dispatch(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self.write_response(writer, status, payload, extra_headers, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError as e:
+            await self.write_response(writer, HTTPStatus.BAD_REQUEST, {"error": str(e)}, {}, False)
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        """Parse a request line, headers and body; None at end of stream"""
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise ValueError("malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0) or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError("request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], headers, body
+
+    async def write_response(self, writer, status, payload, extra_headers, keep_alive):
+        if isinstance(payload, str):
+            # Plain text (Prometheus metrics)
+            body = payload.encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        headers = {
+            "Content-Type": content_type,
+            "Content-Length": str(len(body)),
+            "Connection": "keep-alive" if keep_alive else "close",
+            **extra_headers,
+        }
+        head = f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+        await writer.drain()
+
+    async def dispatch(self, method, path, body):
+        """Route a request; returns (status, payload, extra headers)"""
+        self.requests += 1
+        if path == "/health" and method == "GET":
+            return HTTPStatus.OK, self.health(), {}
+        if path == "/stats" and method == "GET":
+            return HTTPStatus.OK, self.stats(), {}
+        if path == "/metrics" and method == "GET":
+            return HTTPStatus.OK, self.metrics(), {}
+        if path == "/facets" and method == "GET":
+            return HTTPStatus.OK, {"facets": self.engine.facets()}, {}
+        if path not in ("/query", "/batch"):
+            return HTTPStatus.NOT_FOUND, {"error": "not found"}, {}
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "use POST"}, {"Allow": "POST"}
+
+        try:
+            data = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            return HTTPStatus.BAD_REQUEST, {"error": "body must be JSON"}, {}
+
+        # Backpressure: shed load instead of queueing without bound
+        if self.in_flight >= self.max_in_flight:
+            self.rejected += 1
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "server busy"}, {"Retry-After": "1"}
+
+        filters = data.get("filters") if isinstance(data, dict) else None
+        if filters is not None and not isinstance(filters, dict):
+            return HTTPStatus.BAD_REQUEST, {"error": "'filters' must be an object"}, {}
+
+        self.in_flight += 1
+        try:
+            if path == "/query":
+                query = data.get("query") if isinstance(data, dict) else None
+                if not isinstance(query, str) or not query.strip():
+                    return HTTPStatus.BAD_REQUEST, {"error": "'query' must be a non-empty string"}, {}
+                if filters:
+                    # Batches share one filter, so filtered queries are answered on their own
+                    result = await asyncio.get_running_loop().run_in_executor(
+                        self.executor, self.engine.answer_legal_query, query, filters
+                    )
+                    return HTTPStatus.OK, result, {}
+                return HTTPStatus.OK, await self.batcher.submit(query), {}
+
+            queries = data.get("queries") if isinstance(data, dict) else None
+            if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+                return HTTPStatus.BAD_REQUEST, {"error": "'queries' must be a list of strings"}, {}
+            if len(queries) > MAX_BATCH_QUERIES:
+                return HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": f"at most {MAX_BATCH_QUERIES} queries"}, {}
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, partial(self.engine.answer_legal_queries, queries, filters=filters)
+            )
+            return HTTPStatus.OK, {"results": results}, {}
+        except ValueError as e:
+            # Unknown filter field or malformed condition
+            return HTTPStatus.BAD_REQUEST, {"error": str(e)}, {}
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}, {}
+        finally:
+            self.in_flight -= 1
+
+    def health(self):
+        return {
+            "status": "ok",
+            "knowledge_base_size": len(self.engine.knowledge_base),
+            "knowledge_base_version": self.engine.snapshot.version,
+            "semantic_search": self.engine.semantic_ready,
+            "model_ready": self.engine.model_ready.is_set(),
+        }
+
+    def stats(self):
+        return {
+            "uptime": time.time() - self.started_at,
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "batches": self.batcher.batches,
+            "batched_queries": self.batcher.batched_queries,
+            "cache": self.engine.cache_stats(),
+        }
+
+    def metrics(self):
+        """Engine histograms plus server counters, in Prometheus text format"""
+        lines = [
+            "# HELP lawgpt_http_requests_total HTTP requests received.",
+            "# TYPE lawgpt_http_requests_total counter",
+            f"lawgpt_http_requests_total {self.requests}",
+            "# HELP lawgpt_http_rejected_total Requests rejected with 503.",
+            "# TYPE lawgpt_http_rejected_total counter",
+            f"lawgpt_http_rejected_total {self.rejected}",
+            "# HELP lawgpt_http_in_flight Requests being processed.",
+            "# TYPE lawgpt_http_in_flight gauge",
+            f"lawgpt_http_in_flight {self.in_flight}",
+        ]
+        return self.engine.metrics_text() + "\n".join(lines) + "\n"
+
+    async def serve(self, host, port):
+        self.batcher.start()
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"✅ LAW-GPT API listening on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+            self.executor.shutdown(wait=False)
+
+
+def main():
+    """Run the LAW-GPT HTTP/JSON API"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=4, help="scoring worker threads")
+    parser.add_argument("--max-in-flight", type=int, default=64, help="requests processed at once before 503")
+    parser.add_argument("--batch-window-ms", type=float, default=5.0, help="micro-batching window")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    # Serve keyword answers immediately while the embedding model loads
+    os.environ.setdefault("LAWGPT_LAZY_MODEL", "1")
+    engine = get_shared_engine()
+    server = LawGPTServer(engine, args.workers, args.max_in_flight, args.batch_window_ms, args.max_batch_size)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
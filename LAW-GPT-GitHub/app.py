@@ -6,7 +6,6 @@ Main application file for Railway deployment
 
 import streamlit as st
 import json
-import time
 import os
 import sys
 from datetime import datetime
@@ -54,6 +53,14 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource(show_spinner="🚀 Loading LAW-GPT 2.0 System...")
+def load_law_gpt_system():
+    """One LAW-GPT engine per process, shared by all browser sessions"""
+    # Answer with keyword search while the embedding model loads
+    os.environ.setdefault("LAWGPT_LAZY_MODEL", "1")
+    from high_accuracy_law_gpt import get_shared_engine
+    return get_shared_engine()
+
 class LAWGPTApp:
     """LAW-GPT 2.0 Application"""
     
@@ -64,11 +71,8 @@ class LAWGPTApp:
     def initialize_system(self):
         """Initialize the LAW-GPT system"""
         try:
-            from high_accuracy_law_gpt import HighAccuracyLawGPT
-            
             if 'law_gpt_system' not in st.session_state:
-                with st.spinner("🚀 Loading LAW-GPT 2.0 System..."):
-                    st.session_state.law_gpt_system = HighAccuracyLawGPT()
+                st.session_state.law_gpt_system = load_law_gpt_system()
                 st.success("✅ LAW-GPT 2.0 System Loaded!")
             
             self.law_gpt_system = st.session_state.law_gpt_system
@@ -104,6 +108,8 @@ class LAWGPTApp:
         **Platform:** Railway Cloud  
         """)
         
+        self.render_filters()
+        
         st.sidebar.markdown("## 🏛️ Legal Domains")
         domains = [
             "Criminal Law - IPC", "Criminal Procedure - CrPC", "Constitutional Law",
@@ -115,6 +121,33 @@ class LAWGPTApp:
         for domain in domains:
             st.sidebar.markdown(f"• {domain}")
     
+    def render_filters(self):
+        """Sidebar filters narrowing retrieval to one legal domain and act"""
+        if not self.law_gpt_system:
+            return
+        
+        st.sidebar.markdown("## 🔎 Filter Results")
+        filters = {}
+        # Counts come from the metadata bitsets, so they reflect the loaded knowledge base
+        facets = self.law_gpt_system.facets()
+        domain = st.sidebar.selectbox(
+            "Domain", ["All"] + list(facets["domain"]),
+            format_func=lambda value: value if value == "All" else f"{value} ({facets['domain'][value]})"
+        )
+        if domain != "All":
+            filters["domain"] = domain
+        
+        # Acts available within the chosen domain
+        acts = self.law_gpt_system.facets(filters)["act"]
+        act = st.sidebar.selectbox(
+            "Act", ["All"] + list(acts),
+            format_func=lambda value: value if value == "All" else f"{value} ({acts[value]})"
+        )
+        if act != "All":
+            filters["act"] = act
+        
+        st.session_state.filters = filters
+    
     def render_main_interface(self):
         """Render main interface"""
         st.markdown("## 💬 Ask Your Legal Question")
@@ -161,37 +194,46 @@ class LAWGPTApp:
             st.error("❌ LAW-GPT system not available")
             return
         
-        with st.spinner("🔍 Analyzing your legal query..."):
-            try:
-                start_time = time.time()
-                result = self.law_gpt_system.answer_legal_query(query)
-                response_time = time.time() - start_time
-                
-                self.display_response(query, result, response_time)
-                
-            except Exception as e:
-                st.error(f"❌ Error: {e}")
+        try:
+            st.markdown("### 📝 Your Query")
+            st.info(f"**Question:** {query}")
+            filters = st.session_state.get("filters") or None
+            if filters:
+                st.caption("Filtered to: " + ", ".join(filters.values()))
+            # Metrics are filled in above the answer once it has finished streaming
+            metrics = st.container()
+            
+            # Response, rendered chunk by chunk as it is produced
+            st.markdown("### ⚖️ Legal Guidance")
+            answer = self.law_gpt_system.stream_legal_query(query, filters)
+            if hasattr(st, "write_stream"):
+                st.write_stream(answer)
+            else:
+                st.markdown("".join(answer))
+            
+            with metrics:
+                self.display_metrics(answer.result)
+            self.display_system_info(answer.result)
+            
+        except Exception as e:
+            st.error(f"❌ Error: {e}")
     
-    def display_response(self, query, result, response_time):
-        """Display response"""
-        st.markdown("### 📝 Your Query")
-        st.info(f"**Question:** {query}")
-        
-        # Metrics
-        col1, col2, col3, col4 = st.columns(4)
+    def display_metrics(self, result):
+        """Display answer metrics"""
+        col1, col2, col3, col4, col5 = st.columns(5)
         with col1:
             st.metric("🎯 Accuracy", f"{result['accuracy_estimate']:.1%}")
         with col2:
             st.metric("📊 Grade", result['quality_grade'])
         with col3:
-            st.metric("⚡ Time", f"{response_time:.3f}s")
+            st.metric("⚡ First Chunk", f"{result['time_to_first_chunk']:.3f}s")
         with col4:
+            st.metric("⏱️ Total", f"{result['response_time']:.3f}s")
+        with col5:
             st.metric("🔍 Confidence", f"{result['confidence']:.2f}")
-        
-        # Response
-        st.markdown("### ⚖️ Legal Guidance")
-        st.markdown(result['response'])
-        
+    
+    def display_system_info(self, result):
+        """Display system information"""
         # Additional info
         with st.expander("📊 System Information"):
             st.write(f"**Domain:** {result['domain']}")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+LAW-GPT 2.0 - Encoder Benchmark
+Per-query and batched encode latency per backend, checked against reference embeddings
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+
+from dense_index import document_text
+from document_store import DocumentStore, find_knowledge_base
+from encoders import BACKENDS, check_consistency, load_encoder
+from high_accuracy_law_gpt import EMBEDDING_MODEL_NAME
+
+QUERIES = [
+    "Section 302 IPC punishment for murder",
+    "How to file an FIR?",
+    "Cheque bounce under Section 138 NI Act",
+    "Anticipatory bail procedure",
+    "Consumer complaint for defective product",
+    "Divorce by mutual consent",
+    "Right to information application",
+    "Bail in non-bailable offences",
+]
+
+
+def percentile(samples, q):
+    return float(np.percentile(samples, q)) * 1000
+
+
+def benchmark(encoder, queries, documents, repeats, batch_size):
+    """Latency of single-query encodes and throughput of batched document encodes"""
+    encoder.encode(queries[:1])  # warm-up
+    single = []
+    for _ in range(repeats):
+        for query in queries:
+            start = time.perf_counter()
+            encoder.encode([query])
+            single.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    encoder.encode(documents, batch_size=batch_size)
+    batched = time.perf_counter() - start
+    return {
+        "query_p50_ms": percentile(single, 50),
+        "query_p95_ms": percentile(single, 95),
+        "batch_size": batch_size,
+        "batch_docs_per_s": len(documents) / batched if batched else 0.0,
+    }
+
+
+def main():
+    """Compare encoder backends for latency and agreement with sentence-transformers"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--model-dir", default=str(APP_DIR / "models"))
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    store = DocumentStore.open(find_knowledge_base(APP_DIR))
+    documents = [document_text(doc) for doc in store.documents] or QUERIES
+    texts = QUERIES + documents
+
+    # The torch model defines the embedding space every backend must match
+    reference_encoder = load_encoder("sentence-transformers", EMBEDDING_MODEL_NAME, args.model_dir)
+    reference = reference_encoder.encode(texts, batch_size=args.batch_size)
+
+    report = {}
+    for backend in args.backends:
+        start = time.perf_counter()
+        try:
+            encoder = reference_encoder if backend == "sentence-transformers" else load_encoder(
+                backend, EMBEDDING_MODEL_NAME, args.model_dir)
+        except Exception as e:
+            print(f"⚠️ {backend} not available: {e}")
+            continue
+        row = {"load_s": time.perf_counter() - start}
+        row.update(check_consistency(encoder, reference, texts))
+        row.update(benchmark(encoder, QUERIES, documents, args.repeats, args.batch_size))
+        report[backend] = row
+
+    print(f"{'backend':<22} {'query p50':>10} {'query p95':>10} {'docs/s':>9} {'min cos':>8}  consistent")
+    for backend, row in report.items():
+        print(f"{backend:<22} {row['query_p50_ms']:>8.2f}ms {row['query_p95_ms']:>8.2f}ms "
+              f"{row['batch_docs_per_s']:>9.1f} {row['min_cosine']:>8.4f}  {row['consistent']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
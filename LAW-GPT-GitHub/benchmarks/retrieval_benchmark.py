@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+LAW-GPT 2.0 - Retrieval Benchmark
+Latency, throughput, memory, build time and recall@k/MRR per retrieval mode on synthetic corpora
+"""
+
+import argparse
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+
+from document_store import METADATA_KEY
+
+SIZES = (1000, 10000, 100000)
+MODES = ("lexical", "dense", "hybrid", "citation", "typo")
+# Query set each mode is measured on
+MODE_QUERIES = {"citation": "citation", "typo": "typo"}
+ACTS = ("IPC", "CrPC", "CPC", "NI Act", "Evidence Act", "IT Act")
+SYLLABLES = [c + v for c in "bdfghklmnprstvz" for v in "aeiou"]
+
+# Metrics where a higher value is worse, and the relative change that counts as a regression.
+# p95/p99 are reported but not gated: a few hundred queries put only a
+# handful of samples in the tail, so one slow query fails the comparison.
+LOWER_IS_BETTER = ("p50_ms",)
+HIGHER_IS_BETTER = ("qps", "recall_at_k", "mrr")
+MIN_LATENCY_CHANGE_MS = 0.05
+
+
+def make_vocabulary(rng, size):
+    """Distinct pseudo-words built from syllables"""
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+def misspell(word, rng):
+    """One random substitution, deletion or adjacent transposition inside a word"""
+    i = rng.randrange(1, len(word) - 1)
+    edit = rng.choice(("substitute", "delete", "transpose"))
+    if edit == "substitute":
+        return word[:i] + rng.choice([c for c in "aeiou" if c != word[i]]) + word[i + 1:]
+    if edit == "delete":
+        return word[:i] + word[i + 1:]
+    return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+
+
+def generate_corpus(n_docs, n_queries, seed=13):
+    """Synthetic documents plus keyword and citation queries labelled with relevant ids
+
+    Content words follow a Zipf distribution; each document also carries three
+    topic words in its title, keywords and content. Keyword queries mix one
+    topic word with content words, so they are not trivially unique; typo
+    queries repeat them with the topic word misspelled.
+    """
+    rng = random.Random(seed)
+    # Separate stream, so adding typo queries left the other queries unchanged
+    typo_rng = random.Random(seed + 1)
+    vocabulary = make_vocabulary(rng, max(5000, n_docs // 4))
+    weights = [1.0 / rank for rank in range(1, len(vocabulary) + 1)]
+    topic_words = vocabulary[len(vocabulary) // 10:]
+
+    documents = []
+    for i in range(n_docs):
+        act, section = ACTS[i % len(ACTS)], i // len(ACTS) + 1
+        topic = rng.sample(topic_words, 3)
+        content = rng.choices(vocabulary, weights=weights, k=rng.randint(40, 120)) + topic
+        rng.shuffle(content)
+        documents.append({
+            "id": f"doc_{i}",
+            "title": f"Section {section} {act} - {' '.join(topic[:2])}",
+            "content": " ".join(content) + ".",
+            "keywords": topic,
+            "accuracy_score": 100,
+        })
+
+    queries = []
+    for _ in range(n_queries):
+        i = rng.randrange(n_docs)
+        doc = documents[i]
+        # One topic word, two words from the content and one frequent word as noise
+        content = doc["content"].rstrip(".").split()
+        topic_word = rng.sample(doc["keywords"], 1)
+        words = topic_word + rng.sample(content, 2) + rng.choices(vocabulary[:50], k=1)
+        rng.shuffle(words)
+        queries.append({"query": " ".join(words), "relevant": [doc["id"]], "kind": "keyword"})
+        typo = [misspell(word, typo_rng) if word == topic_word[0] else word for word in words]
+        queries.append({"query": " ".join(typo), "relevant": [doc["id"]], "kind": "typo"})
+        act, section = ACTS[i % len(ACTS)], i // len(ACTS) + 1
+        queries.append({"query": f"What does Section {section} {act} say?", "relevant": [doc["id"]], "kind": "citation"})
+    return documents, queries
+
+
+def write_jsonl(documents, path):
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(json.dumps({METADATA_KEY: {"version": "benchmark"}}) + "\n")
+        for doc in documents:
+            f.write(json.dumps(doc) + "\n")
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(latencies, rankings, queries, top_k):
+    """Latency percentiles, throughput and ranking quality for one mode"""
+    latencies = np.array(latencies)
+    recall, reciprocal_ranks = [], []
+    for ranked, query in zip(rankings, queries):
+        relevant = set(query["relevant"])
+        ranked = ranked[:top_k]
+        recall.append(len(relevant.intersection(ranked)) / len(relevant))
+        rank = next((position for position, doc_id in enumerate(ranked, 1) if doc_id in relevant), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+    return {
+        "queries": len(queries),
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "qps": float(len(latencies) / latencies.sum()) if latencies.sum() else 0.0,
+        "recall_at_k": float(np.mean(recall)),
+        "mrr": float(np.mean(reciprocal_ranks)),
+    }
+
+
+def run_size(n_docs, n_queries, top_k, seed):
+    """Build an engine over a synthetic corpus and measure every available mode"""
+    from config import LawGPTConfig
+    from high_accuracy_law_gpt import HighAccuracyLawGPT
+
+    documents, queries = generate_corpus(n_docs, n_queries, seed)
+    with tempfile.TemporaryDirectory(prefix="lawgpt-bench-") as directory:
+        kb_path = Path(directory) / "knowledge_base.jsonl"
+        write_jsonl(documents, kb_path)
+        del documents
+
+        config = LawGPTConfig.from_env(knowledge_base=str(kb_path), top_k=top_k, cache_size=0,
+                                       lazy_model=False, hot_reload=False)
+        start = time.perf_counter()
+        engine = HighAccuracyLawGPT(config)
+        build_s = time.perf_counter() - start
+
+        searches = {
+            "lexical": lambda q: [doc.get("id") for doc, _ in engine.search_knowledge_base(q)],
+            "citation": lambda q: [c["id"] for c in engine.answer_legal_query(q)["candidates"]],
+            "typo": lambda q: [doc.get("id") for doc, _ in engine.search_knowledge_base(q)],
+        }
+        if engine.semantic_ready:
+            searches["dense"] = lambda q: [doc.get("id") for doc, _ in engine.semantic_search(q)]
+            searches["hybrid"] = lambda q: [c["doc"].get("id") for c in engine.hybrid_search(q)]
+
+        modes = {}
+        for mode in MODES:
+            if mode not in searches:
+                continue
+            kind = MODE_QUERIES.get(mode, "keyword")
+            mode_queries = [query for query in queries if query["kind"] == kind]
+            search = searches[mode]
+            search(mode_queries[0]["query"])  # warm-up
+            latencies, rankings = [], []
+            for query in mode_queries:
+                t0 = time.perf_counter()
+                rankings.append(search(query["query"]))
+                latencies.append(time.perf_counter() - t0)
+            modes[mode] = summarize(latencies, rankings, mode_queries, top_k)
+
+        result = {
+            "documents": len(engine.knowledge_base),
+            "passages": len(engine.snapshot.passages),
+            "build_s": build_s,
+            "peak_rss_mb": peak_rss_mb(),
+            "modes": modes,
+        }
+        engine.close()
+        engine.snapshot.document_store.close()
+    return result
+
+
+def run_in_subprocess(n_docs, args):
+    """One fresh interpreter per corpus size, so peak RSS is not shared"""
+    command = [sys.executable, __file__, "--worker", str(n_docs), "--queries", str(args.queries),
+               "--top-k", str(args.top_k), "--seed", str(args.seed)]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"benchmark for {n_docs} documents failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare(report, baseline, tolerance):
+    """Changes against a previous report; returns the regressions found"""
+    regressions = []
+    for size, result in report["results"].items():
+        previous_result = baseline.get("results", {}).get(size)
+        if previous_result is None:
+            continue
+        for mode, metrics in result["modes"].items():
+            previous = previous_result["modes"].get(mode)
+            if previous is None:
+                continue
+            for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+                old, new = previous[metric], metrics[metric]
+                if metric in ("recall_at_k", "mrr"):
+                    # Quality is compared in absolute terms
+                    worse = new < old - 0.01
+                elif metric in LOWER_IS_BETTER:
+                    # Microsecond jitter on very fast modes is not a regression
+                    worse = new > old * (1 + tolerance) and new - old > MIN_LATENCY_CHANGE_MS
+                else:
+                    worse = new < old * (1 - tolerance)
+                if worse:
+                    regressions.append(f"{size} docs / {mode} / {metric}: {old:.4g} -> {new:.4g}")
+    return regressions
+
+
+def print_report(report):
+    print(f"{'docs':>7} {'mode':<9} {'p50':>8} {'p95':>8} {'p99':>8} {'qps':>9} {'recall@k':>9} {'mrr':>6}")
+    for size, result in report["results"].items():
+        for mode, m in result["modes"].items():
+            print(f"{size:>7} {mode:<9} {m['p50_ms']:>6.2f}ms {m['p95_ms']:>6.2f}ms {m['p99_ms']:>6.2f}ms "
+                  f"{m['qps']:>9.1f} {m['recall_at_k']:>9.3f} {m['mrr']:>6.3f}")
+        print(f"{size:>7} build {result['build_s']:.2f}s, peak RSS {result['peak_rss_mb']:.0f} MB, "
+              f"{result['passages']} passages")
+
+
+def main():
+    """Benchmark retrieval latency and quality on synthetic knowledge bases"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--queries", type=int, default=200, help="keyword and citation queries per size")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="previous report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="relative latency/throughput change counted as a regression")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_size(args.worker, args.queries, args.top_k, args.seed)))
+        return 0
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "top_k": args.top_k,
+        "queries": args.queries,
+        "seed": args.seed,
+        "results": {str(n_docs): run_in_subprocess(n_docs, args) for n_docs in args.sizes},
+    }
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"⚠️ Regression: {regression}")
+        if regressions:
+            return 1
+        print("✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
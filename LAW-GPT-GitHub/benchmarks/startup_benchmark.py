@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+LAW-GPT 2.0 - Startup Benchmark
+Import time, time-to-first-answer and model readiness, eager vs lazy vs prebuilt index
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+# Runs in a fresh interpreter so import caches do not skew the numbers
+PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import high_accuracy_law_gpt
+t_import = time.perf_counter()
+engine = high_accuracy_law_gpt.HighAccuracyLawGPT()
+t_engine = time.perf_counter()
+result = engine.answer_legal_query(sys.argv[2])
+t_answer = time.perf_counter()
+engine.model_ready.wait()
+t_ready = time.perf_counter()
+semantic = engine.answer_legal_query(sys.argv[2])
+print(json.dumps({
+    "import_s": t_import - t0,
+    "engine_s": t_engine - t_import,
+    "first_answer_s": t_answer - t0,
+    "first_answer_mode": result["retrieval_mode"],
+    "model_ready_s": t_ready - t0,
+    "semantic_ready": engine.semantic_ready,
+    "mode_after_ready": semantic["retrieval_mode"],
+}))
+"""
+
+
+def run_probe(lazy, query, index_dir=""):
+    # Answer cache off, so the query after the model is ready is retrieved again
+    env = dict(os.environ, LAWGPT_LAZY_MODEL="1" if lazy else "0", LAWGPT_HOT_RELOAD="0",
+               LAWGPT_INDEX_DIR=index_dir, LAWGPT_CACHE_SIZE="0")
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE, str(APP_DIR), query],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    """Measure cold-start latency of the eager and lazy initialization modes"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--query", default="cheque bounce penalty")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--index-dir", help="also measure eager startup from this prebuilt index")
+    args = parser.parse_args()
+
+    modes = [("eager", False, ""), ("lazy", True, "")]
+    if args.index_dir:
+        modes.append(("index", False, str(Path(args.index_dir).resolve())))
+
+    report = {}
+    for mode, lazy, index_dir in modes:
+        runs = [run_probe(lazy, args.query, index_dir) for _ in range(args.runs)]
+        report[mode] = {
+            key: sorted(run[key] for run in runs)[len(runs) // 2]
+            for key in runs[0]
+        }
+
+    print(f"{'mode':<6} {'import':>8} {'engine':>8} {'1st answer':>11} {'model ready':>12}  first/after")
+    for mode, row in report.items():
+        print(f"{mode:<6} {row['import_s']:>7.3f}s {row['engine_s']:>7.3f}s {row['first_answer_s']:>10.3f}s "
+              f"{row['model_ready_s']:>11.3f}s  {row['first_answer_mode']}/{row['mode_after_ready']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+LAW-GPT 2.0 - Citation Recognizer
+Parse statute citations ("Section 302 IPC", "s.154 CrPC", "Article 21") for exact lookup
+"""
+
+import re
+
+CONSTITUTION = "CONSTITUTION"
+
+# Canonical act -> spellings; dots and spacing inside abbreviations are optional
+ACT_ALIASES = {
+    "IPC": (r"i\.?\s?p\.?\s?c\.?", r"indian\s+penal\s+code", r"penal\s+code"),
+    "CRPC": (r"cr\.?\s?p\.?\s?c\.?", r"code\s+of\s+criminal\s+procedure", r"criminal\s+procedure\s+code"),
+    "CPC": (r"c\.?\s?p\.?\s?c\.?", r"code\s+of\s+civil\s+procedure", r"civil\s+procedure\s+code"),
+    "NI": (r"n\.?\s?i\.?\s+act", r"negotiable\s+instruments?\s+act"),
+    "IEA": (r"i\.?\s?e\.?\s?a\.?", r"(?:indian\s+)?evidence\s+act"),
+    "IT": (r"i\.?\s?t\.?\s+act", r"information\s+technology\s+act"),
+    "HMA": (r"h\.?\s?m\.?\s?a\.?", r"hindu\s+marriage\s+act"),
+    CONSTITUTION: (r"(?:the\s+)?constitution(?:\s+of\s+india)?",),
+}
+
+# How each act is written in responses
+ACT_NAMES = {
+    "IPC": "IPC", "CRPC": "CrPC", "CPC": "CPC", "NI": "NI Act", "IEA": "Evidence Act",
+    "IT": "IT Act", "HMA": "Hindu Marriage Act", CONSTITUTION: "Constitution",
+}
+
+_ACT_GROUPS = {f"act_{i}": act for i, act in enumerate(ACT_ALIASES)}
+_ACT = "|".join(
+    f"(?P<{group}>{'|'.join(ACT_ALIASES[act])})" for group, act in _ACT_GROUPS.items()
+)
+_NUMBER = r"(?P<number>\d{1,5}[a-z]{0,2})\b"
+_SECTION = r"(?<![a-z])(?:sections?|secs?\.?|ss?\.|u/s\.?|§)\s*"
+
+# "Section 302 IPC", "s.154 of the Cr.P.C.", "u/s 138 NI Act"
+SECTION_ACT_PATTERN = re.compile(
+    rf"{_SECTION}{_NUMBER}(?:\s*(?:,\s*|of\s+(?:the\s+)?)?(?:{_ACT})(?![a-z]))?", re.IGNORECASE
+)
+# "IPC 302", "IPC Section 302"
+ACT_SECTION_PATTERN = re.compile(
+    rf"(?<![a-z])(?:{_ACT})\s*(?:{_SECTION})?{_NUMBER}", re.IGNORECASE
+)
+# "Article 21", "Art. 14"
+ARTICLE_PATTERN = re.compile(rf"\b(?:articles?|art\.)\s*{_NUMBER}", re.IGNORECASE)
+
+
+def _act(match):
+    for group, act in _ACT_GROUPS.items():
+        if match.group(group):
+            return act
+    return None
+
+
+def parse_citations(text):
+    """Return the (act, section) pairs cited in text, in order of appearance
+
+    ``act`` is the canonical act name, or None when only a section number
+    was given.
+    """
+    found = []
+    for pattern in (SECTION_ACT_PATTERN, ACT_SECTION_PATTERN, ARTICLE_PATTERN):
+        for match in pattern.finditer(text):
+            act = CONSTITUTION if pattern is ARTICLE_PATTERN else _act(match)
+            found.append((match.start(), (act, match.group("number").upper())))
+
+    citations = []
+    for _, citation in sorted(found):
+        if citation not in citations:
+            citations.append(citation)
+    # "Section 302 IPC" also matches "IPC 302"-style; keep the act-qualified one
+    return [
+        (act, section) for act, section in citations
+        if act is not None or not any(other == section for other_act, other in citations if other_act)
+    ]
+
+
+def format_citation(citation):
+    act, section = citation
+    if act == CONSTITUTION:
+        return f"Article {section}"
+    return f"Section {section} {ACT_NAMES[act]}" if act else f"Section {section}"
+
+
+class CitationIndex:
+    """(act, section) -> document id, built from document titles and keywords"""
+
+    def __init__(self):
+        self.by_citation = {}
+        # Section number -> acts it appears under, to resolve "Section 138" alone
+        self.acts_by_section = {}
+
+    @classmethod
+    def build(cls, documents):
+        index = cls()
+        for doc_id, doc in enumerate(documents):
+            index.add_document(doc_id, doc)
+        return index
+
+    def add_document(self, doc_id, doc):
+        # The title names the provision a document is about; content may cite others
+        citations = parse_citations(doc.get("title", ""))
+        if not citations:
+            citations = parse_citations(" ".join(doc.get("keywords", [])))
+        for act, section in citations:
+            if act is None:
+                continue
+            self.by_citation.setdefault((act, section), doc_id)
+            self.acts_by_section.setdefault(section, set()).add(act)
+
+    def __len__(self):
+        return len(self.by_citation)
+
+    def to_list(self):
+        """[[act, section, doc id]] in citation order, for saving"""
+        return [[act, section, doc_id] for (act, section), doc_id in sorted(self.by_citation.items())]
+
+    @classmethod
+    def from_list(cls, entries):
+        index = cls()
+        for act, section, doc_id in entries:
+            index.by_citation[(act, section)] = doc_id
+            index.acts_by_section.setdefault(section, set()).add(act)
+        return index
+
+    def resolve(self, citation):
+        """Document id for a citation, or None"""
+        act, section = citation
+        if act is None:
+            acts = self.acts_by_section.get(section, ())
+            if len(acts) != 1:
+                return None
+            act = next(iter(acts))
+        return self.by_citation.get((act, section))
+
+    def lookup(self, query):
+        """[(citation, doc id)] for every citation in the query found in the index"""
+        hits = []
+        for citation in parse_citations(query):
+            doc_id = self.resolve(citation)
+            if doc_id is not None and all(doc_id != hit for _, hit in hits):
+                hits.append((citation, doc_id))
+        return hits
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+LAW-GPT 2.0 - Configuration
+Tunable settings, overridable with LAWGPT_* environment variables
+"""
+
+import os
+from dataclasses import dataclass, fields
+
+
+@dataclass
+class LawGPTConfig:
+    """Settings for HighAccuracyLawGPT"""
+
+    # Load the embedding model in the background; answer with keyword search until it is ready
+    lazy_model: bool = False
+    # Knowledge base file (default: knowledge_base.jsonl, else knowledge_base.json, next to the app)
+    knowledge_base: str = ""
+    # Prebuilt index (python index_artifact.py build): a version directory or a root with a LATEST pointer.
+    # Replicas memory-map it instead of parsing and embedding the knowledge base at startup
+    index_dir: str = ""
+    # Compare every index file with its manifest checksum at load (reads the whole index)
+    verify_index: bool = False
+    # Encoder backend: "sentence-transformers", "onnx" or "onnx-int8" (CPU inference without torch)
+    embedding_backend: str = "sentence-transformers"
+    # Where exported ONNX models are kept (default: models/ next to the app)
+    model_dir: str = ""
+    # Number of results returned by search
+    top_k: int = 3
+    # Candidates taken from each retriever before fusion
+    candidate_depth: int = 20
+    # Documents are indexed as overlapping passages of this many words
+    passage_words: int = 200
+    passage_overlap: int = 50
+    # Document score from its passages: "max" (best passage) or "sum"
+    passage_aggregation: str = "max"
+    # Matching passages shown per answer
+    max_passages: int = 2
+    # Typo tolerance: maximum edit distance (0 disables) and corrections added per unknown term
+    typo_max_distance: int = 2
+    typo_max_candidates: int = 3
+    # "rrf" (reciprocal rank fusion) or "weighted" (normalized score blend)
+    fusion: str = "rrf"
+    lexical_weight: float = 0.5
+    dense_weight: float = 0.5
+    rrf_k: int = 60
+    # Minimum cosine similarity for a dense-only candidate
+    semantic_threshold: float = 0.45
+    # Switch dense search to the IVF-PQ index at this corpus size
+    ann_min_documents: int = 50000
+    # Inverted lists probed per query and exact re-rank depth (recall/latency knobs)
+    ann_nprobe: int = 8
+    ann_rerank: int = 100
+    # Worker processes for sharded search: 1 = in-process, 0 = one per core
+    search_processes: int = 1
+    # Queries scored together by answer_legal_queries
+    batch_chunk_size: int = 256
+    # Answer cache: maximum entries (0 disables) and time-to-live in seconds (0 = no expiry)
+    cache_size: int = 1024
+    cache_ttl: float = 300.0
+    # Time each query stage and add a per-query breakdown ("trace") to results
+    tracing: bool = False
+    # Watch the knowledge base file and swap in new indexes when it changes
+    hot_reload: bool = False
+    reload_interval: float = 2.0
+
+    @classmethod
+    def from_env(cls, **overrides):
+        """Build a config from LAWGPT_<FIELD> environment variables"""
+        values = {}
+        for field in fields(cls):
+            raw = os.environ.get(f"LAWGPT_{field.name.upper()}")
+            if raw is None:
+                continue
+            if field.type is bool:
+                values[field.name] = raw.strip().lower() in ("1", "true", "yes", "on")
+            else:
+                values[field.name] = field.type(raw)
+        values.update(overrides)
+        return cls(**values)
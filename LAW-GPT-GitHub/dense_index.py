@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+LAW-GPT 2.0 - Dense Index
+Precomputed sentence embeddings searched with a single matrix-vector product
+"""
+
+import threading
+
+import numpy as np
+
+from ranking import select_top_k, select_top_k_rows
+
+EMBEDDING_BATCH_SIZE = 64
+
+# Fast tokenizers are not safe to call from several threads at once
+_encode_lock = threading.Lock()
+
+
+def document_text(doc):
+    """Text that represents a document in embedding space"""
+    keywords = ", ".join(doc.get("keywords", []))
+    return f"{doc.get('title', '')}. {keywords}. {doc.get('content', '')}"
+
+
+def normalize_rows(vectors):
+    """L2-normalize embedding rows as float32"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def encode_texts(model, texts, batch_size=EMBEDDING_BATCH_SIZE):
+    """Encode texts in batches into a normalized float32 matrix"""
+    batches = []
+    for start in range(0, len(texts), batch_size):
+        with _encode_lock:
+            batch = model.encode(texts[start:start + batch_size], batch_size=batch_size, convert_to_numpy=True)
+        batches.append(normalize_rows(batch))
+    if not batches:
+        dimension = model.get_sentence_embedding_dimension() or 0
+        return np.zeros((0, dimension), dtype=np.float32)
+    return np.vstack(batches)
+
+
+class DenseIndex:
+    """Normalized float32 document embedding matrix"""
+
+    def __init__(self, embeddings, documents):
+        self.embeddings = embeddings
+        self.documents = documents
+
+    @classmethod
+    def build(cls, documents, model, batch_size=EMBEDDING_BATCH_SIZE, texts=None):
+        """Embed every document once, in batches; ``texts`` are their document_text if already known"""
+        if texts is None:
+            texts = [document_text(doc) for doc in documents]
+        embeddings = encode_texts(model, texts, batch_size)
+        return cls(embeddings, documents)
+
+    def score(self, query_vector):
+        """Cosine similarity of a normalized query vector to every document"""
+        return self.embeddings @ query_vector
+
+    def search_ids(self, query_vector, top_k=3):
+        """Return (doc_ids, scores) of the exact top-k"""
+        scores = self.score(query_vector)
+        return select_top_k(np.arange(len(scores)), scores, top_k)
+
+    def search_ids_batch(self, query_vectors, top_k=3):
+        """Exact top-k for a batch of query vectors with one matrix product"""
+        return select_top_k_rows(query_vectors @ self.embeddings.T, top_k)
+
+    def score_ids(self, query_vector, doc_ids):
+        """Cosine similarity of the query to specific documents"""
+        return np.asarray(self.embeddings[np.asarray(doc_ids, dtype=np.int64)]) @ query_vector
+
+    def search(self, query_vector, top_k=3):
+        """Return the top (document, score) pairs for a query vector"""
+        doc_ids, scores = self.search_ids(query_vector, top_k)
+        return [(self.documents[doc_id], float(score)) for doc_id, score in zip(doc_ids, scores)]
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+LAW-GPT 2.0 - Document Store
+Streaming JSON Lines knowledge base with compact records and lazy content
+
+Content is read back by byte offset from the file the store opened, so a
+knowledge_base.jsonl must be replaced atomically (write a new file, then
+rename it over the old one). A file rewritten in place is detected and its
+reads raise KnowledgeBaseChanged instead of returning another record's text.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+from embedding_cache import content_hash
+
+METADATA_KEY = "_metadata"
+
+
+class KnowledgeBaseChanged(Exception):
+    """The file behind a store was modified after it was opened; its offsets no longer apply"""
+
+    def __init__(self, store, reason):
+        super().__init__(f"{store.path} changed on disk since it was loaded ({reason})")
+        self.store = store
+
+
+class Document:
+    """Compact knowledge base record; content is read from disk on demand"""
+
+    __slots__ = ("id", "title", "keywords", "accuracy_score", "domain", "act", "year", "content_hash",
+                 "_content", "_store", "_offset", "_length")
+    FIELDS = ("id", "title", "content", "keywords", "accuracy_score", "domain", "act", "year", "content_hash")
+
+    def __init__(self, record, store=None, offset=0, length=0, digest=None):
+        self.id = record.get("id")
+        self.title = record.get("title", "")
+        self.keywords = tuple(record.get("keywords", ()))
+        self.accuracy_score = record.get("accuracy_score")
+        # Filter metadata
+        self.domain = record.get("domain")
+        self.act = record.get("act")
+        self.year = record.get("year")
+        # A prebuilt index supplies the hash, so content is not read to compute it
+        self.content_hash = digest or content_hash(record)
+        # Without a backing file the content has to stay in memory
+        self._content = None if store is not None else record.get("content", "")
+        self._store = store
+        self._offset = offset
+        self._length = length
+
+    @property
+    def content(self):
+        if self._content is not None:
+            return self._content
+        return self._store.read_record(self._offset, self._length, self).get("content", "")
+
+    def get(self, key, default=None):
+        """dict-style access so documents work wherever raw records did"""
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        return default
+
+    def __getitem__(self, key):
+        value = self.get(key, KeyError)
+        if value is KeyError:
+            raise KeyError(key)
+        return value
+
+    def to_dict(self):
+        """Full record, including content"""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "content": self.content,
+            "keywords": list(self.keywords),
+            "domain": self.domain,
+            "act": self.act,
+            "year": self.year,
+            "accuracy_score": self.accuracy_score,
+        }
+
+
+def iter_jsonl(f):
+    """Yield (record, byte offset, byte length) for each line of a binary JSONL file"""
+    offset = 0
+    for line in f:
+        length = len(line)
+        if line.strip():
+            yield json.loads(line), offset, length
+        offset += length
+
+
+class DocumentStore:
+    """Documents of one knowledge base file, loaded record by record"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.metadata = {}
+        self.documents = []
+        self._file = None
+        # (inode, size, mtime) of the open file, checked before every lazy read
+        self._file_stat = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path, on_document=None):
+        """Load a .jsonl (streamed) or legacy .json knowledge base
+
+        ``on_document(document, record)`` is called as each record arrives so
+        indexes can be built without holding every full record in memory.
+        """
+        store = cls(path)
+        if store.path.suffix == ".jsonl":
+            # Hold the file open so lazy reads keep seeing this version when a
+            # new knowledge base is renamed over it; in-place rewrites are detected
+            store._open_file()
+            records = store._stream_jsonl()
+        else:
+            records = store._read_json()
+
+        for document, record in records:
+            store.documents.append(document)
+            if on_document is not None:
+                on_document(document, record)
+        return store
+
+    def _stream_jsonl(self):
+        for record, offset, length in iter_jsonl(self._file):
+            if METADATA_KEY in record:
+                self.metadata = record[METADATA_KEY]
+                continue
+            yield Document(record, self, offset, length), record
+
+    def _read_json(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.metadata = data.get("metadata", {})
+        for record in data.get("knowledge_base", []):
+            yield Document(record), record
+
+    def _open_file(self):
+        self._file = open(self.path, "rb")
+        self._file_stat = self._stat()
+
+    def _stat(self):
+        stat = os.fstat(self._file.fileno())
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def read_record(self, offset, length, document=None):
+        """Read a single record back from its byte range
+
+        Raises KnowledgeBaseChanged if the file was modified since it was
+        opened, or if the record read is not ``document``.
+        """
+        with self._lock:
+            if self._stat() != self._file_stat:
+                raise KnowledgeBaseChanged(self, "file modified in place")
+            self._file.seek(offset)
+            line = self._file.read(length)
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise KnowledgeBaseChanged(self, f"no record at byte {offset}") from None
+        if document is not None and (record.get("id") != document.id
+                                     or content_hash(record) != document.content_hash):
+            raise KnowledgeBaseChanged(self, f"record at byte {offset} is not {document.id!r}")
+        return record
+
+    @classmethod
+    def restore(cls, path, entries, metadata=None):
+        """Open a store written by write_documents from its entries, without parsing any line"""
+        store = cls(path)
+        store.metadata = metadata or {}
+        store._open_file()
+        store.documents = [
+            Document(entry, store, entry["offset"], entry["length"], digest=entry["content_hash"])
+            for entry in entries
+        ]
+        return store
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def write_documents(documents, path):
+    """Write documents as JSON Lines; returns the entries DocumentStore.restore needs
+
+    Entries hold every field but the content, plus the byte range of the
+    document's line, so a restored store reads content on demand.
+    """
+    entries = []
+    offset = 0
+    with open(path, "wb") as f:
+        for doc in documents:
+            line = (json.dumps(doc.to_dict(), ensure_ascii=False) + "\n").encode("utf-8")
+            f.write(line)
+            entry = {field: doc.get(field) for field in Document.FIELDS if field != "content"}
+            entry["keywords"] = list(doc.get("keywords", ()))
+            entry.update(offset=offset, length=len(line))
+            entries.append(entry)
+            offset += len(line)
+    return entries
+
+
+def find_knowledge_base(directory):
+    """Prefer knowledge_base.jsonl, falling back to the legacy knowledge_base.json"""
+    directory = Path(directory)
+    jsonl_path = directory / "knowledge_base.jsonl"
+    return jsonl_path if jsonl_path.exists() else directory / "knowledge_base.json"
+
+
+def convert_json_to_jsonl(json_path, jsonl_path):
+    """Convert a {"metadata", "knowledge_base"} file to JSON Lines"""
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    records = data.get("knowledge_base", [])
+    # Written beside the target and renamed over it, so a running engine
+    # never reads a half-written or rewritten file
+    tmp_path = Path(f"{jsonl_path}.tmp")
+    with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(json.dumps({METADATA_KEY: data.get("metadata", {})}, ensure_ascii=False) + "\n")
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, jsonl_path)
+    return len(records)
+
+
+def main():
+    """Convert knowledge_base.json to knowledge_base.jsonl"""
+    import argparse
+
+    here = Path(__file__).parent
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("source", nargs="?", default=here / "knowledge_base.json")
+    parser.add_argument("target", nargs="?", default=here / "knowledge_base.jsonl")
+    args = parser.parse_args()
+
+    count = convert_json_to_jsonl(args.source, args.target)
+    print(f"✅ Wrote {count} documents to {args.target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+LAW-GPT 2.0 - Embedding Cache
+Memory-mapped document embeddings stored next to the knowledge base
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from dense_index import EMBEDDING_BATCH_SIZE, document_text, encode_texts
+
+
+def content_hash(doc):
+    """Hash of the exact text a document is embedded from"""
+    precomputed = getattr(doc, "content_hash", None)
+    if precomputed:
+        return precomputed
+    return hashlib.sha256(document_text(doc).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Embedding matrix (.npy) plus a manifest of model and per-document hashes"""
+
+    def __init__(self, kb_path):
+        kb_path = Path(kb_path)
+        self.matrix_path = kb_path.with_name(f"{kb_path.stem}.embeddings.npy")
+        self.manifest_path = kb_path.with_name(f"{kb_path.stem}.embeddings.json")
+        self.ann_path = kb_path.with_name(f"{kb_path.stem}.ann")
+        self.fingerprint = ""
+
+    def load(self, model_name, dimension):
+        """Return (hashes, mmap'd matrix) if a cache for this model exists"""
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("model") != model_name or manifest.get("dimension") != dimension:
+                return None
+
+            matrix = np.load(self.matrix_path, mmap_mode="r")
+            hashes = [entry["hash"] for entry in manifest.get("documents", [])]
+            if matrix.dtype != np.float32 or matrix.shape != (len(hashes), dimension):
+                return None
+            return hashes, matrix
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, matrix, documents, hashes, model_name):
+        """Write the matrix and manifest atomically"""
+        manifest = {
+            "model": model_name,
+            "dimension": int(matrix.shape[1]),
+            "count": int(matrix.shape[0]),
+            "documents": [
+                {"id": doc.get("id", str(row)), "hash": doc_hash}
+                for row, (doc, doc_hash) in enumerate(zip(documents, hashes))
+            ],
+        }
+
+        matrix_tmp = self.matrix_path.with_name(self.matrix_path.name + ".tmp")
+        manifest_tmp = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        with open(matrix_tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+        with open(manifest_tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(matrix_tmp, self.matrix_path)
+        os.replace(manifest_tmp, self.manifest_path)
+
+    def embed(self, documents, model, model_name, batch_size=EMBEDDING_BATCH_SIZE, texts=None):
+        """Return document embeddings, encoding only new or changed documents
+
+        ``texts`` are the document_text of each document when the caller
+        already has them, so passages are not re-read from their parents.
+        """
+        dimension = model.get_sentence_embedding_dimension()
+        hashes = [content_hash(doc) for doc in documents]
+        self.fingerprint = hashlib.sha256(f"{model_name}:{''.join(hashes)}".encode("utf-8")).hexdigest()
+
+        cached = self.load(model_name, dimension)
+        if cached is not None and cached[0] == hashes:
+            # Unchanged knowledge base: serve straight from the memory map
+            return cached[1]
+
+        cached_rows = {}
+        if cached is not None:
+            cached_rows = {doc_hash: row for row, doc_hash in enumerate(cached[0])}
+
+        matrix = np.empty((len(documents), dimension), dtype=np.float32)
+        missing = []
+        for row, doc_hash in enumerate(hashes):
+            if doc_hash in cached_rows:
+                matrix[row] = cached[1][cached_rows[doc_hash]]
+            else:
+                missing.append(row)
+
+        if missing:
+            if texts is None:
+                missing_texts = [document_text(documents[row]) for row in missing]
+            else:
+                missing_texts = [texts[row] for row in missing]
+            matrix[missing] = encode_texts(model, missing_texts, batch_size)
+        print(f"✅ Embedding cache: reused {len(documents) - len(missing)}, encoded {len(missing)}")
+
+        try:
+            self.save(matrix, documents, hashes, model_name)
+            return np.load(self.matrix_path, mmap_mode="r")
+        except OSError as e:
+            print(f"⚠️ Embedding cache not saved: {e}")
+            return matrix
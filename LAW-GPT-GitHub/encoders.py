@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+LAW-GPT 2.0 - Embedding Encoders
+Pluggable sentence encoders: sentence-transformers, ONNX Runtime, int8 ONNX
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+BACKENDS = ("sentence-transformers", "onnx", "onnx-int8")
+MAX_SEQUENCE_LENGTH = 256
+
+
+class SentenceTransformerEncoder:
+    """Reference backend: the torch SentenceTransformer model"""
+
+    backend = "sentence-transformers"
+    # Minimum cosine similarity to the reference embeddings
+    tolerance = 1.0
+
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+
+    @property
+    def name(self):
+        """Identifies the embedding space (used to key embedding caches)"""
+        return self.model_name
+
+    def get_sentence_embedding_dimension(self):
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        return self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+
+def export_onnx(model_name, directory):
+    """Export the transformer of a SentenceTransformer to ONNX (needs torch once)"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+
+    dummy = tokenizer(["LAW-GPT export"], return_tensors="pt")
+    inputs = ("input_ids", "attention_mask", "token_type_ids")
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in inputs}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(dummy[name] for name in inputs),
+            str(directory / "model.onnx"),
+            input_names=list(inputs),
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+    tokenizer.save_pretrained(str(directory))
+    return directory / "model.onnx"
+
+
+def quantize_onnx(source, target):
+    """Dynamic int8 weight quantization of an ONNX model"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(str(source), str(target), weight_type=QuantType.QInt8)
+    return Path(target)
+
+
+class OnnxEncoder:
+    """ONNX Runtime backend with mean pooling; no torch needed at runtime"""
+
+    backend = "onnx"
+    tolerance = 0.999
+
+    def __init__(self, model_name, model_dir):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.directory = Path(model_dir) / f"{model_name}-onnx"
+        model_path = self.prepare()
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(str(self.directory / "tokenizer.json"))
+        self.tokenizer.enable_truncation(MAX_SEQUENCE_LENGTH)
+        self.tokenizer.enable_padding()
+        self.dimension = self.session.get_outputs()[0].shape[-1]
+
+    @property
+    def name(self):
+        return f"{self.model_name}:{self.backend}"
+
+    def prepare(self):
+        """Path of the ONNX model, exporting it on first use"""
+        model_path = self.directory / "model.onnx"
+        if not model_path.exists():
+            print(f"⚙️ Exporting {self.model_name} to ONNX")
+            export_onnx(self.model_name, self.directory)
+        return model_path
+
+    def get_sentence_embedding_dimension(self):
+        if isinstance(self.dimension, int):
+            return self.dimension
+        return self.encode(["dimension probe"]).shape[1]
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + batch_size])
+            feed = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            feed = {name: value for name, value in feed.items() if name in self.input_names}
+            hidden = self.session.run(None, feed)[0]
+            # Mean pooling over real tokens, as in the sentence-transformers model
+            mask = feed["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            batches.append(pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12))
+        embeddings = np.vstack(batches).astype(np.float32) if batches else np.zeros((0, 0), dtype=np.float32)
+        return embeddings[0] if single else embeddings
+
+
+class QuantizedOnnxEncoder(OnnxEncoder):
+    """ONNX Runtime backend with int8 dynamically quantized weights"""
+
+    backend = "onnx-int8"
+    tolerance = 0.98
+
+    def prepare(self):
+        model_path = self.directory / "model.int8.onnx"
+        if not model_path.exists():
+            source = super().prepare()
+            print(f"⚙️ Quantizing {self.model_name} to int8")
+            quantize_onnx(source, model_path)
+        return model_path
+
+
+def load_encoder(backend, model_name, model_dir):
+    """Create the encoder for a configured backend"""
+    if backend == "sentence-transformers":
+        return SentenceTransformerEncoder(model_name)
+    if backend == "onnx":
+        return OnnxEncoder(model_name, model_dir)
+    if backend == "onnx-int8":
+        return QuantizedOnnxEncoder(model_name, model_dir)
+    raise ValueError(f"unknown encoder backend {backend!r}, expected one of {BACKENDS}")
+
+
+def check_consistency(encoder, reference_embeddings, texts):
+    """Cosine similarity of an encoder's output to reference embeddings
+
+    Returns min/mean similarity and whether the minimum is within the
+    encoder's tolerance.
+    """
+    embeddings = np.asarray(encoder.encode(list(texts)), dtype=np.float32)
+    reference = np.asarray(reference_embeddings, dtype=np.float32)
+    embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    reference = reference / np.maximum(np.linalg.norm(reference, axis=1, keepdims=True), 1e-12)
+    similarity = (embeddings * reference).sum(axis=1)
+    return {
+        "backend": encoder.backend,
+        "min_cosine": float(similarity.min()),
+        "mean_cosine": float(similarity.mean()),
+        "tolerance": encoder.tolerance,
+        "consistent": bool(similarity.min() >= encoder.tolerance - 1e-6),
+    }
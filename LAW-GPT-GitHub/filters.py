@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+LAW-GPT 2.0 - Metadata Filters
+Bitset indexes over domain/act/year for pre-filtered retrieval and facet counts
+"""
+
+import numpy as np
+
+FILTER_FIELDS = ("domain", "act", "year")
+# Fields whose conditions may be {"min", "max"} ranges
+NUMERIC_FIELDS = ("year",)
+
+# Set bits per byte value, for counting documents in a packed bitset
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.int64)
+
+
+def popcount(bits):
+    return int(_POPCOUNT[bits].sum())
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _filter_value(field, value):
+    """A condition value checked for its type; numeric fields accept numeric strings
+
+    Raises ValueError so callers can report a bad request instead of failing
+    on a comparison later.
+    """
+    if field in NUMERIC_FIELDS and isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            try:
+                return float(value)
+            except ValueError:
+                raise ValueError(f"filter {field!r} expects a number, got {value!r}") from None
+    if field in NUMERIC_FIELDS and not _is_number(value):
+        raise ValueError(f"filter {field!r} expects a number, got {value!r}")
+    if field not in NUMERIC_FIELDS and not isinstance(value, str):
+        raise ValueError(f"filter {field!r} expects a string, got {value!r}")
+    return value
+
+
+def copy_facets(facets):
+    return {field: dict(counts) for field, counts in facets.items()}
+
+
+class FilterIndex:
+    """One packed bitset (1 bit per document) for every value of every filter field"""
+
+    def __init__(self, n_docs=0):
+        self.n_docs = n_docs
+        self.bitsets = {field: {} for field in FILTER_FIELDS}
+        self.all_documents = np.packbits(np.ones(n_docs, dtype=bool))
+        self._facets = None
+
+    @classmethod
+    def build(cls, documents):
+        index = cls(len(documents))
+        for field in FILTER_FIELDS:
+            positions = {}
+            for doc_id, doc in enumerate(documents):
+                value = doc.get(field)
+                if value is not None:
+                    positions.setdefault(value, []).append(doc_id)
+            for value, doc_ids in positions.items():
+                mask = np.zeros(len(documents), dtype=bool)
+                mask[doc_ids] = True
+                index.bitsets[field][value] = np.packbits(mask)
+        return index
+
+    def _field_bits(self, field, condition):
+        """OR of the bitsets matching one field's condition"""
+        values = self.bitsets[field]
+        if isinstance(condition, dict):
+            # Range, e.g. {"min": 1950, "max": 2000}
+            if field not in NUMERIC_FIELDS:
+                raise ValueError(f"filter {field!r} does not take a range")
+            unknown = set(condition) - {"min", "max"}
+            if unknown:
+                raise ValueError(f"unknown range keys {sorted(map(str, unknown))} for filter {field!r}")
+            low, high = (None if condition.get(key) is None else _filter_value(field, condition[key])
+                         for key in ("min", "max"))
+            selected = [v for v in values if _is_number(v) and (low is None or v >= low)
+                        and (high is None or v <= high)]
+        elif isinstance(condition, (list, tuple, set)):
+            condition = [_filter_value(field, value) for value in condition]
+            selected = [v for v in condition if v in values]
+        else:
+            condition = _filter_value(field, condition)
+            selected = [condition] if condition in values else []
+
+        bits = np.zeros_like(self.all_documents)
+        for value in selected:
+            np.bitwise_or(bits, values[value], out=bits)
+        return bits
+
+    def select(self, filters):
+        """Bitset of documents matching every field's condition, or None without filters
+
+        Each condition is a value, a list of values (any of them) or, for
+        numeric fields, a {"min", "max"} range. Raises ValueError for an
+        unknown field or a condition of the wrong type.
+        """
+        if not filters:
+            return None
+        bits = self.all_documents.copy()
+        for field, condition in filters.items():
+            if field not in self.bitsets:
+                raise ValueError(f"unknown filter field {field!r}, expected one of {FILTER_FIELDS}")
+            np.bitwise_and(bits, self._field_bits(field, condition), out=bits)
+        return bits
+
+    def mask(self, bits):
+        """Boolean mask over documents for a bitset"""
+        return np.unpackbits(bits, count=self.n_docs).astype(bool)
+
+    def facets(self, bits=None):
+        """{field: {value: document count}} within a bitset (default: every document)
+
+        Unfiltered counts are computed once; callers get a copy they may modify.
+        """
+        if bits is None and self._facets is not None:
+            return copy_facets(self._facets)
+        facets = {
+            field: {
+                value: count
+                for value, count in (
+                    (value, popcount(value_bits if bits is None else value_bits & bits))
+                    for value, value_bits in sorted(values.items(), key=lambda item: str(item[0]))
+                )
+                if count
+            }
+            for field, values in self.bitsets.items()
+        }
+        if bits is None:
+            self._facets = copy_facets(facets)
+        return facets
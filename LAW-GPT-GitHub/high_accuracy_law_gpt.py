@@ -7,52 +7,516 @@ Downloads models on first run
 import json
 import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 from pathlib import Path
+from time import perf_counter_ns
+
+import numpy as np
+
+from ann_index import IVFPQIndex
+from citations import CitationIndex, format_citation, parse_citations
+from config import LawGPTConfig
+from dense_index import DenseIndex, document_text, encode_texts
+from document_store import DocumentStore, KnowledgeBaseChanged, find_knowledge_base
+from embedding_cache import EmbeddingCache
+from encoders import load_encoder
+from filters import FilterIndex, copy_facets
+from hybrid_retriever import HybridRetriever
+from index_artifact import IndexArtifact, index_pointer
+from lexical_index import BM25Index
+from passages import best_documents, chunk_document, passage_excerpt, passage_texts
+from query_cache import QueryCache, normalize_query
+from sharded_search import ShardedDenseIndex, ShardedLexicalIndex, ShardPool
+from spelling import SymSpell
+from tracing import NULL_TRACE, QueryMetrics, Trace, shared_span
+
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# One engine per process, shared by every UI session and API worker
+_shared_engine = None
+_shared_engine_lock = threading.Lock()
+
+LEGAL_DISCLAIMER = "**⚠️ Legal Disclaimer:** This is general legal information. For specific legal advice, please consult a qualified lawyer."
+# Characters of each supporting result shown in a streamed answer
+SUPPORTING_EXCERPT_CHARS = 300
+# Shown in place of a document's text when its file was rewritten under a live snapshot
+CONTENT_UNAVAILABLE = "_The knowledge base file changed on disk; this text will be available once it is reloaded._"
+
+class StreamingAnswer:
+    """Iterator over response chunks; ``result`` is filled in once it is exhausted
+    
+    Pass it straight to ``st.write_stream`` and read ``result`` afterwards.
+    """
+    
+    def __init__(self, produce):
+        self.result = None
+        # produce(answer) is a generator that sets answer.result when done
+        self._chunks = produce(self)
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        return next(self._chunks)
+
+class KnowledgeSnapshot:
+    """Indexes built from one version of the knowledge base
+    
+    Snapshots are never modified after they are published; a reload builds a
+    new one and swaps the engine's reference, so in-flight queries finish
+    against the snapshot they started with.
+    """
+    
+    def __init__(self, version=0):
+        self.version = version
+        self.knowledge_base = []
+        self.document_store = None
+        # Retrieval units: overlapping passages of the documents, and the
+        # index of each document's first passage
+        self.passages = []
+        self.passage_starts = []
+        # Embedding text of each passage record, kept from chunking until the
+        # dense index is built so passages are not re-read from their parents
+        self.passage_texts = None
+        self.lexical_index = BM25Index()
+        # (act, section) -> document id for exact statute lookups
+        self.citation_index = CitationIndex()
+        # Domain/act/year bitsets, and the document of every passage for
+        # turning a document filter into a passage mask
+        self.filter_index = FilterIndex()
+        self.passage_doc_ids = np.zeros(0, dtype=np.int32)
+        # Typo-tolerant lookups over the lexical vocabulary
+        self.spelling = None
+        self.dense_index = None
+        self.retriever = None
+        # Worker processes serving this snapshot in sharded mode
+        self.shard_pool = None
+        # Prebuilt index the snapshot was loaded from, if any
+        self.artifact = None
+        # (mtime, size) of the knowledge base file (or index pointer) this snapshot was built from
+        self.kb_stat = None
 
 class HighAccuracyLawGPT:
     """Lightweight LAW-GPT system for GitHub deployment"""
     
-    def __init__(self):
-        self.knowledge_base = []
+    def __init__(self, config=None):
+        self.config = config or LawGPTConfig.from_env()
+        self.kb_path = self.find_knowledge_base(Path(__file__).parent)
         self.embedding_model = None
-        self.load_knowledge_base()
-        self.load_embedding_model()
+        self.query_cache = QueryCache(self.config.cache_size, self.config.cache_ttl)
+        self.metrics = QueryMetrics()
+        self.snapshot = KnowledgeSnapshot()
+        self._reload_lock = threading.Lock()
+        self._reload_executor = None
+        self._watch_stop = threading.Event()
+        self._watcher = None
+        self._failed_stat = None
+        # Store whose file was found rewritten in place, so it triggers one reload
+        self._changed_store = None
+        # Set once the embedding model load has finished (successfully or not)
+        self.model_ready = threading.Event()
+        self._model_loader = None
+        
+        if self.config.lazy_model:
+            # Keyword search is usable as soon as the knowledge base is indexed;
+            # the model loads in the background and semantic search joins later
+            self.snapshot = self.build_snapshot()
+            self._model_loader = threading.Thread(target=self._load_model_in_background,
+                                                  name="lawgpt-model-loader", daemon=True)
+            self._model_loader.start()
+        else:
+            self.load_embedding_model()
+            self.model_ready.set()
+            self.snapshot = self.build_snapshot()
+        if self.config.hot_reload:
+            self.start_watching()
+    
+    @property
+    def semantic_ready(self):
+        """True once queries are answered with dense retrieval as well"""
+        return self.snapshot.dense_index is not None
+    
+    @property
+    def knowledge_base(self):
+        return self.snapshot.knowledge_base
     
-    def load_knowledge_base(self):
-        """Load knowledge base"""
+    @property
+    def document_store(self):
+        return self.snapshot.document_store
+    
+    @property
+    def lexical_index(self):
+        return self.snapshot.lexical_index
+    
+    @property
+    def dense_index(self):
+        return self.snapshot.dense_index
+    
+    @property
+    def retriever(self):
+        return self.snapshot.retriever
+    
+    def build_snapshot(self, previous=None):
+        """Load the knowledge base and build every index for it"""
+        snapshot = KnowledgeSnapshot(previous.version + 1 if previous else 0)
+        if not (self.config.index_dir and self.load_index(snapshot)):
+            self.load_knowledge_base(snapshot, previous)
+            self.build_citation_index(snapshot)
+        self.build_filter_index(snapshot)
+        self.build_spelling_index(snapshot)
+        self.build_dense_index(snapshot)
+        if self.config.search_processes != 1:
+            self.start_shards(snapshot)
+        self.build_retriever(snapshot)
+        return snapshot
+    
+    def load_knowledge_base(self, snapshot, previous=None):
+        """Stream the knowledge base, indexing documents as they arrive"""
         try:
-            kb_path = Path(__file__).parent / "knowledge_base.json"
-            if kb_path.exists():
-                with open(kb_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.knowledge_base = data.get("knowledge_base", [])
+            snapshot.kb_stat = self.knowledge_base_stat()
+            snapshot.lexical_index = BM25Index(previous.lexical_index if previous else None)
+            snapshot.passage_texts = []
+            if self.kb_path.exists():
+                snapshot.document_store = DocumentStore.open(self.kb_path, on_document=partial(self.index_document, snapshot))
+                snapshot.knowledge_base = snapshot.document_store.documents
+            snapshot.lexical_index.finalize()
             
-            print(f"✅ Loaded {len(self.knowledge_base)} legal documents")
+            print(f"✅ Loaded {len(snapshot.knowledge_base)} legal documents ({len(snapshot.passages)} passages)")
+            if previous is not None:
+                print(f"✅ Re-indexed {snapshot.lexical_index.tokenized} changed passages, "
+                      f"reused {snapshot.lexical_index.reused}")
             
         except Exception as e:
+            if previous is not None:
+                # A failed reload keeps serving the previous snapshot
+                raise
             print(f"⚠️ Knowledge base error: {e}")
-            self.create_default_knowledge()
+            snapshot.knowledge_base = self.create_default_knowledge()
+            self.build_search_index(snapshot)
+    
+    def load_index(self, snapshot):
+        """Memory-map a prebuilt index instead of parsing the knowledge base; False if unusable"""
+        try:
+            snapshot.kb_stat = self.knowledge_base_stat()
+            artifact = IndexArtifact.open(self.config.index_dir, verify_checksums=self.config.verify_index)
+            document_store = artifact.load_documents()
+            passages, passage_starts = artifact.load_passages(document_store.documents)
+            lexical_index = artifact.load_lexical_index(passages)
+            citation_index = artifact.load_citation_index()
+        except Exception as e:
+            print(f"⚠️ Index not usable, building from the knowledge base: {e}")
+            return False
+        
+        snapshot.artifact = artifact
+        snapshot.document_store = document_store
+        snapshot.knowledge_base = document_store.documents
+        snapshot.passages, snapshot.passage_starts = passages, passage_starts
+        snapshot.lexical_index = lexical_index
+        snapshot.citation_index = citation_index
+        print(f"✅ Loaded index {artifact.version} ({len(snapshot.knowledge_base)} legal documents, "
+              f"{len(passages)} passages)")
+        return True
+    
+    def index_document(self, snapshot, document, record=None):
+        """Split a document into passages and add them to the lexical index"""
+        doc_id = len(snapshot.passage_starts)
+        snapshot.passage_starts.append(len(snapshot.passages))
+        for passage, passage_record in chunk_document(document, doc_id, record, self.config.passage_words,
+                                                      self.config.passage_overlap):
+            snapshot.passages.append(passage)
+            snapshot.passage_texts.append(document_text(passage_record))
+            snapshot.lexical_index.add_document(passage, passage_record)
+    
+    def build_search_index(self, snapshot):
+        """Build the BM25F index used by search"""
+        snapshot.lexical_index = BM25Index()
+        snapshot.passages, snapshot.passage_starts, snapshot.passage_texts = [], [], []
+        for document in snapshot.knowledge_base:
+            self.index_document(snapshot, document)
+        snapshot.lexical_index.finalize()
+    
+    def build_citation_index(self, snapshot):
+        """Index documents by the statute provision their title cites"""
+        snapshot.citation_index = CitationIndex.build(snapshot.knowledge_base)
+        print(f"✅ Indexed {len(snapshot.citation_index)} statute citations")
+    
+    def build_filter_index(self, snapshot):
+        """Bitsets of the domain/act/year metadata used by filtered search"""
+        snapshot.filter_index = FilterIndex.build(snapshot.knowledge_base)
+        snapshot.passage_doc_ids = np.fromiter((passage.doc_id for passage in snapshot.passages),
+                                               dtype=np.int32, count=len(snapshot.passages))
+    
+    def select_filters(self, filters, snapshot):
+        """(document bitset, document mask, passage mask) for a filter dict
+        
+        All three are None without filters, so unfiltered queries keep the
+        unmasked search paths.
+        """
+        bits = snapshot.filter_index.select(filters)
+        if bits is None:
+            return None, None, None
+        allowed_documents = snapshot.filter_index.mask(bits)
+        return bits, allowed_documents, allowed_documents[snapshot.passage_doc_ids]
+    
+    def facets(self, filters=None):
+        """Document counts per domain, act and year, within the filtered documents"""
+        snapshot = self.snapshot
+        return snapshot.filter_index.facets(snapshot.filter_index.select(filters))
+    
+    def build_spelling_index(self, snapshot):
+        """Precompute the symmetric-delete dictionary of the indexed terms"""
+        if self.config.typo_max_distance <= 0:
+            snapshot.spelling = None
+            return
+        snapshot.spelling = SymSpell.from_index(snapshot.lexical_index, self.config.typo_max_distance,
+                                                self.config.typo_max_candidates)
+        print(f"✅ Spelling dictionary of {len(snapshot.spelling)} terms")
     
     def load_embedding_model(self):
         """Load embedding model (downloads on first run)"""
         try:
             # This will download the model on first run on the deployment platform
-            from sentence_transformers import SentenceTransformer
-            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-            print("✅ Embedding model loaded")
+            backend = self.config.embedding_backend
+            model_dir = self.config.model_dir or Path(__file__).parent / "models"
+            try:
+                self.embedding_model = load_encoder(backend, EMBEDDING_MODEL_NAME, model_dir)
+            except Exception as e:
+                if backend == "sentence-transformers":
+                    raise
+                print(f"⚠️ {backend} encoder not available, using sentence-transformers: {e}")
+                self.embedding_model = load_encoder("sentence-transformers", EMBEDDING_MODEL_NAME, model_dir)
+            print(f"✅ Embedding model loaded ({self.embedding_model.backend})")
         except Exception as e:
             print(f"⚠️ Embedding model not available: {e}")
             self.embedding_model = None
     
+    def _load_model_in_background(self):
+        """Lazy mode: load the model, then publish a snapshot with dense search"""
+        try:
+            self.load_embedding_model()
+            if self.embedding_model is None:
+                with self._reload_lock:
+                    # No dense index will be built, so the passage texts are not needed
+                    self.model_ready.set()
+                    self.snapshot.passage_texts = None
+                return
+            with self._reload_lock:
+                previous = self.snapshot
+                snapshot = KnowledgeSnapshot(previous.version + 1)
+                # Same documents and lexical index, plus the dense index
+                snapshot.knowledge_base = previous.knowledge_base
+                snapshot.document_store = previous.document_store
+                snapshot.passages = previous.passages
+                snapshot.passage_starts = previous.passage_starts
+                snapshot.passage_texts = previous.passage_texts
+                snapshot.lexical_index = previous.lexical_index
+                snapshot.citation_index = previous.citation_index
+                snapshot.filter_index = previous.filter_index
+                snapshot.passage_doc_ids = previous.passage_doc_ids
+                snapshot.spelling = previous.spelling
+                snapshot.artifact = previous.artifact
+                snapshot.kb_stat = previous.kb_stat
+                self.build_dense_index(snapshot)
+                if self.config.search_processes != 1:
+                    self.start_shards(snapshot)
+                self.build_retriever(snapshot)
+                self._publish(previous, snapshot)
+                previous.passage_texts = None
+        finally:
+            self.model_ready.set()
+    
+    def build_dense_index(self, snapshot):
+        """Embed the knowledge base, reusing cached embeddings where possible"""
+        if self.embedding_model is None:
+            snapshot.dense_index = None
+            if self.model_ready.is_set():
+                # The model failed to load; in lazy mode it may still be loading
+                snapshot.passage_texts = None
+            return
+        
+        texts, snapshot.passage_texts = snapshot.passage_texts, None
+        try:
+            if snapshot.artifact is not None and self.load_index_embeddings(snapshot):
+                return
+            if texts is None:
+                # Passages restored from a prebuilt index have no records
+                texts = passage_texts(snapshot.passages)
+            if self.kb_path.exists():
+                cache = EmbeddingCache(self.kb_path)
+                embeddings = cache.embed(snapshot.passages, self.embedding_model, self.embedding_model.name,
+                                         texts=texts)
+                snapshot.dense_index = DenseIndex(embeddings, snapshot.passages)
+            else:
+                cache = None
+                snapshot.dense_index = DenseIndex.build(snapshot.passages, self.embedding_model, texts=texts)
+            print(f"✅ Embedded {len(snapshot.passages)} passages")
+            
+            if len(snapshot.passages) >= self.config.ann_min_documents:
+                snapshot.dense_index = self.build_ann_index(snapshot, snapshot.dense_index.embeddings, cache)
+        except Exception as e:
+            print(f"⚠️ Dense index error: {e}")
+            snapshot.dense_index = None
+    
+    def load_index_embeddings(self, snapshot):
+        """Dense (and ANN) index from the prebuilt embedding matrix; False if built for another model"""
+        embeddings = snapshot.artifact.load_embeddings(self.embedding_model.name)
+        if embeddings is None:
+            print(f"⚠️ Index has no embeddings for {self.embedding_model.name}, encoding passages")
+            return False
+        snapshot.dense_index = DenseIndex(embeddings, snapshot.passages)
+        print(f"✅ Memory-mapped {len(snapshot.passages)} passage embeddings")
+        
+        if len(snapshot.passages) >= self.config.ann_min_documents:
+            ann_index = snapshot.artifact.load_ann_index(snapshot.passages, embeddings, self.config.ann_nprobe,
+                                                         self.config.ann_rerank)
+            if ann_index is not None:
+                print(f"✅ ANN index loaded ({ann_index.n_lists} lists)")
+                snapshot.dense_index = ann_index
+            else:
+                snapshot.dense_index = self.build_ann_index(snapshot, embeddings)
+        return True
+    
+    def build_ann_index(self, snapshot, embeddings, cache=None):
+        """Load or train the IVF-PQ index used for large corpora"""
+        options = dict(documents=snapshot.passages, embeddings=embeddings,
+                       nprobe=self.config.ann_nprobe, rerank=self.config.ann_rerank)
+        if cache is not None:
+            ann_index = IVFPQIndex.load(cache.ann_path, fingerprint=cache.fingerprint, **options)
+            if ann_index is not None:
+                print(f"✅ ANN index loaded ({ann_index.n_lists} lists)")
+                return ann_index
+        
+        ann_index = IVFPQIndex.build(**options)
+        print(f"✅ ANN index built ({ann_index.n_lists} lists)")
+        if cache is not None:
+            try:
+                ann_index.save(cache.ann_path, fingerprint=cache.fingerprint)
+            except OSError as e:
+                print(f"⚠️ ANN index not saved: {e}")
+        return ann_index
+    
+    def start_shards(self, snapshot):
+        """Start worker processes that each score a slice of the corpus"""
+        processes = self.config.search_processes or os.cpu_count() or 1
+        try:
+            # The IVF-PQ index is already sub-linear and stays in-process
+            dense_index = snapshot.dense_index if isinstance(snapshot.dense_index, DenseIndex) else None
+            snapshot.shard_pool = ShardPool(snapshot.lexical_index, dense_index, processes)
+            print(f"✅ Sharded search across {len(snapshot.shard_pool.ranges)} processes")
+        except Exception as e:
+            print(f"⚠️ Sharded search not available: {e}")
+            snapshot.shard_pool = None
+    
+    def build_retriever(self, snapshot):
+        """Combine the lexical and dense indexes for hybrid search"""
+        lexical_index, dense_index = snapshot.lexical_index, snapshot.dense_index
+        if snapshot.shard_pool is not None:
+            lexical_index = ShardedLexicalIndex(lexical_index, snapshot.shard_pool)
+            if isinstance(dense_index, DenseIndex):
+                dense_index = ShardedDenseIndex(dense_index, snapshot.shard_pool)
+        snapshot.retriever = HybridRetriever(lexical_index, dense_index, self.embedding_model, self.config,
+                                             snapshot.spelling)
+    
+    def find_knowledge_base(self, directory):
+        """The configured knowledge base file, else the preferred one in ``directory``"""
+        if self.config.knowledge_base:
+            return Path(self.config.knowledge_base)
+        return find_knowledge_base(directory)
+    
+    def knowledge_base_stat(self):
+        """(mtime, size) of the knowledge base file, None if it is missing
+        
+        With a prebuilt index this is the index's LATEST pointer (or manifest),
+        so publishing a new version triggers the hot reload.
+        """
+        try:
+            stat = os.stat(index_pointer(self.config.index_dir) if self.config.index_dir else self.kb_path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+    
+    def reload_knowledge_base(self, wait=False):
+        """Rebuild the indexes in a background thread and swap them in
+        
+        Returns a Future resolving to the active snapshot, or the snapshot
+        itself when ``wait`` is true.
+        """
+        if self._reload_executor is None:
+            self._reload_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lawgpt-reload")
+        future = self._reload_executor.submit(self._reload)
+        return future.result() if wait else future
+    
+    def _reload(self):
+        with self._reload_lock:
+            previous = self.snapshot
+            # A knowledge_base.jsonl may have appeared next to the legacy file
+            self.kb_path = self.find_knowledge_base(self.kb_path.parent)
+            stat = self.knowledge_base_stat()
+            try:
+                snapshot = self.build_snapshot(previous)
+            except Exception as e:
+                # Remember the broken file so the watcher waits for the next change
+                self._failed_stat = stat
+                print(f"⚠️ Knowledge base reload failed, keeping version {previous.version}: {e}")
+                return previous
+            self._publish(previous, snapshot)
+            return snapshot
+    
+    def _publish(self, previous, snapshot):
+        """Make a new snapshot live and retire the previous one"""
+        # Single reference assignment: readers see the old or the new snapshot
+        self.snapshot = snapshot
+        # Cache keys include the snapshot version; clearing just frees memory
+        self.query_cache.clear()
+        if previous.shard_pool is not None:
+            # Waits for in-flight fan-outs; late callers fall back in-process
+            previous.shard_pool.close()
+        print(f"✅ Knowledge base version {snapshot.version} is live")
+    
+    def start_watching(self, interval=None):
+        """Poll the knowledge base file and hot-reload it when it changes"""
+        if self._watcher is not None:
+            return
+        interval = interval or self.config.reload_interval
+        self._watch_stop.clear()
+        
+        def watch():
+            while not self._watch_stop.wait(interval):
+                current = self.find_knowledge_base(self.kb_path.parent)
+                stat = self.knowledge_base_stat()
+                if current != self.kb_path or stat not in (self.snapshot.kb_stat, self._failed_stat):
+                    self._reload()
+        
+        self._watcher = threading.Thread(target=watch, name="lawgpt-kb-watcher", daemon=True)
+        self._watcher.start()
+    
+    def stop_watching(self):
+        """Stop the knowledge base watcher thread"""
+        self._watch_stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+    
+    def close(self):
+        """Stop background threads and shard worker processes"""
+        self.stop_watching()
+        if self.snapshot.shard_pool is not None:
+            self.snapshot.shard_pool.close()
+    
     def create_default_knowledge(self):
         """Create default knowledge base"""
-        self.knowledge_base = [
+        return [
             {
                 "id": "ipc_302",
                 "title": "Section 302 IPC - Murder",
                 "content": "Section 302 IPC deals with punishment for murder. Whoever commits murder shall be punished with death, or imprisonment for life, and shall also be liable to fine.",
                 "keywords": ["murder", "section 302", "ipc", "death penalty", "life imprisonment"],
+                "domain": "Criminal Law",
+                "act": "IPC",
+                "year": 1860,
                 "accuracy_score": 100
             },
             {
@@ -60,6 +524,9 @@ class HighAccuracyLawGPT:
                 "title": "Section 154 CrPC - FIR Registration",
                 "content": "Section 154 CrPC mandates registration of FIR for cognizable offenses. Every information relating to the commission of a cognizable offense must be reduced to writing.",
                 "keywords": ["fir", "section 154", "crpc", "police", "cognizable"],
+                "domain": "Criminal Procedure",
+                "act": "CrPC",
+                "year": 1973,
                 "accuracy_score": 100
             },
             {
@@ -67,60 +534,251 @@ class HighAccuracyLawGPT:
                 "title": "Article 21 - Right to Life and Personal Liberty",
                 "content": "Article 21 of the Constitution states that no person shall be deprived of his life or personal liberty except according to procedure established by law.",
                 "keywords": ["article 21", "constitution", "right to life", "personal liberty"],
+                "domain": "Constitutional Law",
+                "act": "Constitution",
+                "year": 1950,
                 "accuracy_score": 100
             }
         ]
     
     def search_knowledge_base(self, query):
-        """Simple keyword-based search"""
-        query_lower = query.lower()
+        """BM25F keyword search over the inverted index"""
+        query = self.retriever.expand_query(query)
+        results = self.retriever.lexical_index.search(query, top_k=self.config.candidate_depth)
+        return best_documents(results, self.config.top_k)
+    
+    def semantic_search(self, query, top_k=None):
+        """Dense embedding search, falling back to keyword search without a model"""
+        dense_index = self.retriever.dense_index
+        if dense_index is None:
+            return self.search_knowledge_base(query)
+        
+        query_vector = encode_texts(self.embedding_model, [query])[0]
+        results = dense_index.search(query_vector, top_k=self.config.candidate_depth)
+        return best_documents(results, top_k or self.config.top_k)
+    
+    def hybrid_search(self, query, top_k=None):
+        """Fused lexical + dense candidates with per-component scores"""
+        return self.retriever.retrieve(query, top_k=top_k)
+    
+    def citation_candidates(self, query, snapshot, allowed_documents=None):
+        """Documents for the provisions a query cites ("Section 302 IPC"), skipping retrieval"""
+        citations = snapshot.citation_index.lookup(query)
+        if allowed_documents is not None:
+            citations = [(citation, doc_id) for citation, doc_id in citations if allowed_documents[doc_id]]
+        return [
+            {
+                "doc_id": doc_id,
+                "doc": snapshot.knowledge_base[doc_id],
+                "score": 1.0,
+                "confidence": 1.0,
+                "lexical_score": 0.0,
+                "dense_score": 0.0,
+                "citation": format_citation(citation),
+                # A cited provision opens at the start of its document
+                "passages": [snapshot.passages[snapshot.passage_starts[doc_id]]],
+            }
+            for citation, doc_id in citations[:self.config.top_k]
+        ]
+    
+    def answer_legal_query(self, query, filters=None):
+        """Answer legal query
+        
+        ``filters`` restricts retrieval to documents matching metadata
+        conditions, e.g. {"domain": "Criminal Law", "year": {"min": 1950}}.
+        """
+        start_ns = perf_counter_ns()
+        trace = Trace() if self.config.tracing else NULL_TRACE
+        snapshot = self.snapshot
+        
+        with trace.span("normalize"):
+            cache_key = self.cache_key(query, snapshot, filters)
+        with trace.span("cache"):
+            cached = self.query_cache.get(cache_key)
+        if cached is not None:
+            result = self.copy_answer(cached)
+            if not result["candidates"]:
+                # The fallback text quotes the question as the user typed it
+                result["response"] = self.generate_fallback_response(query)
+        else:
+            result = self.build_answer(query, snapshot, trace=trace, filters=filters)
+            self.query_cache.put(cache_key, result)
+            result = self.copy_answer(result)
+        
+        # Per-request fields are always fresh, even on a cache hit
+        response_time = (perf_counter_ns() - start_ns) / 1e9
+        result["query"] = query
+        result["response_time"] = response_time
+        result["cached"] = cached is not None
+        result["timestamp"] = datetime.now().isoformat()
+        if trace.enabled:
+            result["trace"] = trace.breakdown()
+        self.metrics.observe(response_time, trace)
+        return result
+    
+    def stream_legal_query(self, query, filters=None):
+        """Answer a query as a stream of markdown chunks
+        
+        The top document's title and body come first, then supporting
+        results, then the disclaimer. The returned StreamingAnswer's
+        ``result`` carries the usual answer fields plus
+        ``time_to_first_chunk``; ``response_time`` runs until the last chunk.
+        Repeated questions stream from cached retrieval results.
+        """
+        return StreamingAnswer(partial(self._stream_chunks, query, filters))
+    
+    def _stream_chunks(self, query, filters, answer):
+        """Generator behind stream_legal_query"""
+        start_ns = perf_counter_ns()
+        trace = Trace() if self.config.tracing else NULL_TRACE
+        snapshot = self.snapshot
+        
+        # Streaming needs the retrieved documents, not a formatted answer, so
+        # it caches candidates under its own key
+        with trace.span("cache"):
+            cache_key = ("stream",) + self.cache_key(query, snapshot, filters)
+            candidates = self.query_cache.get(cache_key)
+        cached = candidates is not None
+        if not cached:
+            with trace.span("filter"):
+                _, allowed_documents, allowed_passages = self.select_filters(filters, snapshot)
+            with trace.span("citation"):
+                candidates = self.citation_candidates(query, snapshot, allowed_documents)
+            if not candidates:
+                candidates = snapshot.retriever.retrieve(query, trace=trace, allowed=allowed_passages)
+            self.query_cache.put(cache_key, candidates)
+        
+        chunks = []
+        if candidates:
+            best = candidates[0]
+            with trace.span("format"):
+                title = best["doc"].get("title", "Legal Information")
+                passages = best.get("passages")
+                content = self.document_content(best["doc"], passages, self.config.max_passages)
+                chunks.append(f"**{title}**\n\n{content}")
+        else:
+            chunks.append(self.generate_fallback_response(query))
+        time_to_first_chunk = (perf_counter_ns() - start_ns) / 1e9
+        yield chunks[0]
+        
+        if len(candidates) > 1:
+            chunks.append("\n\n**📚 Related provisions**\n")
+            yield chunks[-1]
+            for candidate in candidates[1:]:
+                passages = candidate.get("passages")
+                excerpt = self.document_content(candidate["doc"], passages, 1)
+                if len(excerpt) > SUPPORTING_EXCERPT_CHARS:
+                    excerpt = excerpt[:SUPPORTING_EXCERPT_CHARS].rsplit(" ", 1)[0] + "…"
+                chunks.append(f"\n- **{candidate['doc'].get('title', '')}**: {excerpt}")
+                yield chunks[-1]
+        
+        if candidates:
+            chunks.append(f"\n\n{LEGAL_DISCLAIMER}")
+            yield chunks[-1]
+        
+        # Total includes the time the consumer spent rendering between chunks
+        response_time = (perf_counter_ns() - start_ns) / 1e9
+        result = self.build_answer(query, snapshot, candidates, filters=filters)
+        result["response"] = "".join(chunks)
+        result["response_time"] = response_time
+        result["time_to_first_chunk"] = time_to_first_chunk
+        result["cached"] = cached
+        result["timestamp"] = datetime.now().isoformat()
+        if trace.enabled:
+            result["trace"] = trace.breakdown()
+        self.metrics.observe(response_time, trace)
+        answer.result = result
+    
+    def answer_legal_queries(self, queries, chunk_size=None, filters=None):
+        """Answer many queries at once, returning results in input order
+        
+        Cache misses in each chunk are encoded with one batched embedding
+        call and scored with one matrix product; ``chunk_size`` bounds the
+        size of that score matrix. ``filters`` applies to every query.
+        """
+        chunk_size = chunk_size or self.config.batch_chunk_size
+        snapshot = self.snapshot
+        _, allowed_documents, allowed_passages = self.select_filters(filters, snapshot)
         results = []
         
-        for doc in self.knowledge_base:
-            score = 0
-            
-            # Check keywords
-            for keyword in doc.get("keywords", []):
-                if keyword in query_lower:
-                    score += 3
+        for start in range(0, len(queries), chunk_size):
+            chunk = queries[start:start + chunk_size]
+            chunk_start = perf_counter_ns()
+            # Per-query stages are timed on each query's trace; batched ones are shared out
+            traces = [Trace() if self.config.tracing else NULL_TRACE for _ in chunk]
             
-            # Check title
-            title_words = doc.get("title", "").lower().split()
-            for word in query_lower.split():
-                if word in title_words:
-                    score += 2
+            with shared_span(traces, "normalize"):
+                keys = [self.cache_key(query, snapshot, filters) for query in chunk]
+            with shared_span(traces, "cache"):
+                chunk_results = [self.query_cache.get(key) for key in keys]
+            cached = [result is not None for result in chunk_results]
             
-            # Check content
-            content_words = doc.get("content", "").lower().split()
-            for word in query_lower.split():
-                if word in content_words:
-                    score += 1
+            misses = []
+            for i, result in enumerate(chunk_results):
+                if result is not None:
+                    continue
+                # Cited provisions are answered directly; the rest are retrieved together
+                with traces[i].span("citation"):
+                    cited = self.citation_candidates(chunk[i], snapshot, allowed_documents)
+                if cited:
+                    chunk_results[i] = self.build_answer(chunk[i], snapshot, cited, trace=traces[i], filters=filters)
+                    self.query_cache.put(keys[i], chunk_results[i])
+                else:
+                    misses.append(i)
+            if misses:
+                batch_candidates = snapshot.retriever.retrieve_batch([chunk[i] for i in misses],
+                                                                     allowed=allowed_passages,
+                                                                     traces=[traces[i] for i in misses])
+                for i, candidates in zip(misses, batch_candidates):
+                    chunk_results[i] = self.build_answer(chunk[i], snapshot, candidates, trace=traces[i],
+                                                         filters=filters)
+                    self.query_cache.put(keys[i], chunk_results[i])
             
-            if score > 0:
-                results.append((doc, score))
+            # Batched work has no per-query timing, so report the chunk average
+            response_time = (perf_counter_ns() - chunk_start) / 1e9 / len(chunk)
+            timestamp = datetime.now().isoformat()
+            for query, result, was_cached, trace in zip(chunk, chunk_results, cached, traces):
+                result = self.copy_answer(result)
+                if was_cached and not result["candidates"]:
+                    result["response"] = self.generate_fallback_response(query)
+                result["query"] = query
+                result["response_time"] = response_time
+                result["cached"] = was_cached
+                result["timestamp"] = timestamp
+                if trace.enabled:
+                    result["trace"] = trace.breakdown()
+                self.metrics.observe(response_time, trace)
+                results.append(result)
         
-        results.sort(key=lambda x: x[1], reverse=True)
-        return results[:3]
+        return results
     
-    def answer_legal_query(self, query):
-        """Answer legal query"""
-        start_time = datetime.now()
+    def build_answer(self, query, snapshot, candidates=None, trace=NULL_TRACE, filters=None):
+        """Retrieve and format an answer (everything but per-request fields)"""
+        with trace.span("filter"):
+            bits, allowed_documents, allowed_passages = self.select_filters(filters, snapshot)
         
         # Search knowledge base
-        search_results = self.search_knowledge_base(query)
+        if candidates is None:
+            with trace.span("citation"):
+                candidates = self.citation_candidates(query, snapshot, allowed_documents)
+            if not candidates:
+                candidates = snapshot.retriever.retrieve(query, trace=trace, allowed=allowed_passages)
         
-        if search_results:
-            best_doc, score = search_results[0]
-            response = self.format_response(best_doc)
-            confidence = min(score / 5.0, 1.0)
-            accuracy = 1.0 if score > 3 else 0.8
+        if candidates:
+            best = candidates[0]
+            with trace.span("format"):
+                response = self.format_response(best["doc"], best.get("passages"))
+            confidence = best["confidence"]
+            accuracy = 1.0 if confidence >= 0.5 else 0.8
         else:
             response = self.generate_fallback_response(query)
             confidence = 0.3
             accuracy = 0.5
         
-        end_time = datetime.now()
-        response_time = (end_time - start_time).total_seconds()
+        if candidates and "citation" in candidates[0]:
+            retrieval_mode = "citation"
+        else:
+            retrieval_mode = "hybrid" if snapshot.dense_index is not None else "lexical"
         
         return {
             "query": query,
@@ -128,24 +786,88 @@ class HighAccuracyLawGPT:
             "confidence": confidence,
             "accuracy_estimate": accuracy,
             "quality_grade": "A+" if accuracy >= 0.95 else "A" if accuracy >= 0.85 else "B",
-            "response_time": response_time,
+            "response_time": 0.0,
             "domain": "Legal",
-            "knowledge_base_size": len(self.knowledge_base),
+            "knowledge_base_size": len(snapshot.knowledge_base),
+            "retrieval_mode": retrieval_mode,
+            "filters": filters or {},
+            # Counts within the filtered documents, for narrowing further
+            "facets": snapshot.filter_index.facets(bits),
+            "candidates": [
+                {
+                    "id": candidate["doc"].get("id"),
+                    "title": candidate["doc"].get("title"),
+                    "score": candidate["score"],
+                    "lexical_score": candidate["lexical_score"],
+                    "dense_score": candidate["dense_score"],
+                    "citation": candidate.get("citation"),
+                    "passages": [
+                        {"start": passage.start, "end": passage.end}
+                        for passage in candidate.get("passages", ())
+                    ],
+                }
+                for candidate in candidates
+            ],
             "expert_validated": True,
             "system_version": "2.0-GitHub",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": None
         }
     
-    def format_response(self, doc):
-        """Format legal response"""
+    def copy_answer(self, result):
+        """Copy of a cached answer that callers may modify without changing later cache hits"""
+        result = dict(result)
+        result["candidates"] = [
+            dict(candidate, passages=[dict(passage) for passage in candidate["passages"]])
+            for candidate in result["candidates"]
+        ]
+        result["facets"] = copy_facets(result["facets"])
+        result["filters"] = dict(result["filters"])
+        return result
+    
+    def cache_key(self, query, snapshot, filters=None):
+        """Answer cache key: snapshot version, normalized query, cited provisions and filters
+        
+        Normalizing drops the punctuation citations depend on ("s.154" vs
+        "s 154"), so the parsed citations are part of the key.
+        """
+        filter_key = json.dumps(filters, sort_keys=True, default=sorted) if filters else ""
+        return (snapshot.version, normalize_query(query), tuple(parse_citations(query)), filter_key)
+    
+    def cache_stats(self):
+        """Query cache hit/miss counters"""
+        return self.query_cache.stats()
+    
+    def metrics_text(self):
+        """Latency, stage, candidate and cache metrics in Prometheus text format"""
+        return self.metrics.prometheus(self.cache_stats())
+    
+    def format_response(self, doc, passages=None):
+        """Format legal response, showing only the matching passages of long documents"""
         title = doc.get("title", "Legal Information")
-        content = doc.get("content", "")
+        content = self.document_content(doc, passages, self.config.max_passages)
         
         response = f"**{title}**\n\n{content}"
-        response += "\n\n**⚠️ Legal Disclaimer:** This is general legal information. For specific legal advice, please consult a qualified lawyer."
+        response += f"\n\n{LEGAL_DISCLAIMER}"
         
         return response
     
+    def document_content(self, doc, passages=None, limit=2):
+        """Text of the matching passages of a document, or all of it without passages
+        
+        If the knowledge base file was rewritten in place, the text cannot be
+        read from the live snapshot any more: a notice is returned instead and
+        the knowledge base is reloaded from the new file.
+        """
+        try:
+            return passage_excerpt(passages, limit) if passages else doc.get("content", "")
+        except KnowledgeBaseChanged as e:
+            # Only the live snapshot's store needs a rebuild; older snapshots are retiring
+            if e.store is self.snapshot.document_store and e.store is not self._changed_store:
+                self._changed_store = e.store
+                print(f"⚠️ {e}; reloading")
+                self.reload_knowledge_base()
+            return CONTENT_UNAVAILABLE
+    
     def generate_fallback_response(self, query):
         """Generate fallback response"""
         return f"""**Legal Query Analysis**
@@ -167,3 +889,16 @@ For specific legal matters, I recommend:
 • Labour Court (for employment matters)
 
 **⚠️ Legal Disclaimer:** This is general information only. Please consult a qualified lawyer for specific legal advice."""
+
+def get_shared_engine(config=None):
+    """Return the process-wide HighAccuracyLawGPT, creating it on first use
+    
+    The knowledge base indexes and the embedding model are loaded once per
+    process no matter how many sessions call this.
+    """
+    global _shared_engine
+    if _shared_engine is None:
+        with _shared_engine_lock:
+            if _shared_engine is None:
+                _shared_engine = HighAccuracyLawGPT(config)
+    return _shared_engine
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+LAW-GPT 2.0 - Hybrid Retriever
+Lexical (BM25F) and dense candidates merged with rank or score fusion
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from dense_index import encode_texts
+from passages import Passage, aggregate_passages
+from ranking import select_top_k
+from tracing import NULL_TRACE, shared_span
+
+
+class HybridRetriever:
+    """Runs both candidate generators and fuses their rankings"""
+
+    def __init__(self, lexical_index, dense_index, embedding_model, config, spelling=None):
+        self.lexical_index = lexical_index
+        self.dense_index = dense_index
+        self.embedding_model = embedding_model
+        self.config = config
+        # SymSpell dictionary used to expand misspelled query terms
+        self.spelling = spelling
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def executor(self):
+        """Worker thread for the dense path, created on first use"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lawgpt-dense")
+        return self._executor
+
+    def dense_candidates(self, query, trace=NULL_TRACE, allowed=None):
+        """Encode the query and take the dense top candidates"""
+        with trace.span("embed"):
+            query_vector = encode_texts(self.embedding_model, [query])[0]
+        with trace.span("dense_search"):
+            doc_ids, scores = self.dense_search(query_vector, allowed)
+        return query_vector, doc_ids, scores
+
+    def dense_search(self, query_vector, allowed=None):
+        """Dense top candidates; with a filter only the allowed rows are scored"""
+        if allowed is None:
+            return self.dense_index.search_ids(query_vector, self.config.candidate_depth)
+        allowed_ids = np.flatnonzero(allowed)
+        scores = self.dense_index.score_ids(query_vector, allowed_ids)
+        return select_top_k(allowed_ids, scores, self.config.candidate_depth)
+
+    def expand_query(self, query):
+        """Append corrections of misspelled terms ("murdr" -> "murder") for lexical matching"""
+        if self.spelling is None:
+            return query
+        return self.spelling.expand(query)
+
+    def lexical_candidates(self, query, allowed=None):
+        """Normalized BM25F scores of all matches and ranks of the top candidates"""
+        query = self.expand_query(query)
+        lexical_ids, lexical_scores = self.lexical_index.score(query, allowed)
+        lexical_bound = max(self.lexical_index.max_score(query), 1e-9)
+        lexical_lookup = dict(zip(lexical_ids.tolist(), (lexical_scores / lexical_bound).tolist()))
+        lexical_top, _ = select_top_k(lexical_ids, lexical_scores, self.config.candidate_depth)
+        lexical_ranks = {doc_id: rank for rank, doc_id in enumerate(lexical_top.tolist(), 1)}
+        return lexical_lookup, lexical_ranks
+
+    def retrieve(self, query, top_k=None, trace=NULL_TRACE, allowed=None):
+        """Return fused candidates, best first, with per-component scores
+
+        ``allowed`` is an optional boolean mask over passages; only those
+        passages are scored.
+        """
+        # Encoding and the matrix product run while the lexical path is scored
+        dense_future = None
+        if self.dense_index is not None:
+            dense_future = self.executor.submit(self.dense_candidates, query, trace, allowed)
+
+        with trace.span("lexical"):
+            lexical = self.lexical_candidates(query, allowed)
+        # Time the lexical path did not hide
+        with trace.span("dense_wait"):
+            dense = dense_future.result() if dense_future is not None else None
+        trace.count("candidates_scored", len(lexical[0]) + (len(dense[1]) if dense is not None else 0))
+
+        with trace.span("fusion"):
+            return self.aggregate(self.fuse(lexical, dense, self.passage_depth(top_k)), top_k)
+
+    def retrieve_batch(self, queries, top_k=None, allowed=None, traces=None):
+        """Fused candidates for many queries, in input order
+
+        All queries are encoded with one batched encode call and scored
+        against the embedding matrix with one matrix product. ``traces``
+        holds one Trace per query; each is charged an equal share of the
+        batched stages.
+        """
+        traces = traces or [NULL_TRACE] * len(queries)
+        dense_results = [None] * len(queries)
+        if self.dense_index is not None and queries:
+            with shared_span(traces, "embed"):
+                query_vectors = encode_texts(self.embedding_model, list(queries))
+            with shared_span(traces, "dense_search"):
+                if allowed is None:
+                    top_ids, top_scores = self.dense_index.search_ids_batch(query_vectors, self.config.candidate_depth)
+                else:
+                    top_ids, top_scores = zip(*(self.dense_search(vector, allowed) for vector in query_vectors))
+            dense_results = list(zip(query_vectors, top_ids, top_scores))
+
+        results = []
+        for query, dense, trace in zip(queries, dense_results, traces):
+            with trace.span("lexical"):
+                lexical = self.lexical_candidates(query, allowed)
+            trace.count("candidates_scored", len(lexical[0]) + (len(dense[1]) if dense is not None else 0))
+            with trace.span("fusion"):
+                results.append(self.aggregate(self.fuse(lexical, dense, self.passage_depth(top_k)), top_k))
+        return results
+
+    def passage_depth(self, top_k=None):
+        """Fused passages kept before aggregation: every candidate of both retrievers"""
+        return max(top_k or self.config.top_k, 2 * self.config.candidate_depth)
+
+    def aggregate(self, candidates, top_k=None):
+        """Roll passage candidates up to their documents"""
+        top_k = top_k or self.config.top_k
+        if not candidates or not isinstance(candidates[0]["doc"], Passage):
+            return candidates[:top_k]
+        return aggregate_passages(candidates, top_k, self.config.passage_aggregation)
+
+    def fuse(self, lexical, dense, top_k=None):
+        """Merge lexical and (optional) dense candidates into one ranking"""
+        config = self.config
+        top_k = top_k or config.top_k
+        lexical_lookup, lexical_ranks = lexical
+
+        dense_lookup = {}
+        dense_ranks = {}
+        if dense is not None:
+            query_vector, dense_top, dense_top_scores = dense
+            dense_lookup = dict(zip(dense_top.tolist(), dense_top_scores.tolist()))
+            dense_ranks = {
+                doc_id: rank
+                for rank, (doc_id, score) in enumerate(dense_lookup.items(), 1)
+                if score >= config.semantic_threshold
+            }
+            # Lexical candidates outside the dense top still get a dense score
+            unscored = [doc_id for doc_id in lexical_ranks if doc_id not in dense_lookup]
+            if unscored:
+                dense_lookup.update(zip(unscored, self.dense_index.score_ids(query_vector, unscored).tolist()))
+
+        lexical_weight = config.lexical_weight
+        dense_weight = config.dense_weight if dense is not None else 0.0
+        total_weight = max(lexical_weight + dense_weight, 1e-9)
+
+        candidates = []
+        for doc_id in set(lexical_ranks) | set(dense_ranks):
+            lexical_score = lexical_lookup.get(doc_id, 0.0)
+            dense_score = max(dense_lookup.get(doc_id, 0.0), 0.0)
+            # Confidence always blends both signals, whatever fusion ranks by
+            confidence = (lexical_weight * lexical_score + dense_weight * dense_score) / total_weight
+
+            if config.fusion == "weighted":
+                score = confidence
+            else:
+                score = 0.0
+                if doc_id in lexical_ranks:
+                    score += lexical_weight / (config.rrf_k + lexical_ranks[doc_id])
+                if doc_id in dense_ranks:
+                    score += dense_weight / (config.rrf_k + dense_ranks[doc_id])
+
+            candidates.append({
+                "doc_id": doc_id,
+                "doc": self.lexical_index.documents[doc_id],
+                "score": score,
+                "confidence": min(confidence, 1.0),
+                "lexical_score": lexical_score,
+                "dense_score": dense_score,
+                "lexical_rank": lexical_ranks.get(doc_id),
+                "dense_rank": dense_ranks.get(doc_id),
+            })
+
+        candidates.sort(key=lambda candidate: (-candidate["score"], candidate["doc_id"]))
+        return candidates[:top_k]
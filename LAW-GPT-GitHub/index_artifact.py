@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+LAW-GPT 2.0 - Index Artifact
+Offline build of a versioned index directory that replicas memory-map at startup
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from ann_index import IVFPQIndex
+from citations import CitationIndex
+from dense_index import document_text, encode_texts
+from document_store import DocumentStore, find_knowledge_base, write_documents
+from lexical_index import BM25Index
+from passages import Passage, chunk_document
+
+# Bump when the layout of the directory changes; older artifacts are rejected
+SCHEMA_VERSION = 1
+MANIFEST = "manifest.json"
+# Pointer file in an index root naming the version replicas should load
+LATEST = "LATEST"
+CHECKSUM_CHUNK_BYTES = 1 << 20
+
+
+def file_checksum(path):
+    """sha256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHECKSUM_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def index_pointer(path):
+    """File that changes when a new index is published: LATEST, or the manifest of a fixed version"""
+    path = Path(path)
+    return path / MANIFEST if (path / MANIFEST).exists() else path / LATEST
+
+
+def resolve_index_dir(path):
+    """A version directory, or the one an index root's LATEST pointer names"""
+    path = Path(path)
+    if (path / MANIFEST).exists():
+        return path
+    return path / (path / LATEST).read_text(encoding="utf-8").strip()
+
+
+class IndexArtifact:
+    """A built index directory, validated against its manifest"""
+
+    def __init__(self, directory, manifest):
+        self.directory = Path(directory)
+        self.manifest = manifest
+
+    @property
+    def version(self):
+        return self.manifest["version"]
+
+    @classmethod
+    def open(cls, path, verify_checksums=False):
+        """Validate an index directory (or root); raises ValueError if it cannot be served
+
+        File sizes are always checked; ``verify_checksums`` also reads every
+        file to compare its sha256, which costs a full read of the embeddings.
+        """
+        directory = resolve_index_dir(path)
+        with open(directory / MANIFEST, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("schema_version") != SCHEMA_VERSION:
+            raise ValueError(f"index schema {manifest.get('schema_version')} is not supported "
+                             f"(expected {SCHEMA_VERSION})")
+        for name, expected in manifest["files"].items():
+            file_path = directory / name
+            if not file_path.is_file() or file_path.stat().st_size != expected["bytes"]:
+                raise ValueError(f"index file {name} is missing or truncated")
+            if verify_checksums and file_checksum(file_path) != expected["sha256"]:
+                raise ValueError(f"index file {name} does not match its checksum")
+        return cls(directory, manifest)
+
+    def load_documents(self):
+        """Document store over documents.jsonl; content is read on demand"""
+        with open(self.directory / "documents.json", "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        return DocumentStore.restore(self.directory / "documents.jsonl", entries, self.manifest.get("metadata"))
+
+    def load_passages(self, documents):
+        """Passages and the index of each document's first passage, from saved offsets"""
+        spans = np.load(self.directory / "passages.npy")
+        hashes = (self.directory / "passage_hashes.txt").read_text(encoding="ascii").split()
+        passages = [
+            Passage(documents[doc_id], doc_id, number, start, end, digest=digest)
+            for (doc_id, number, start, end), digest in zip(spans.tolist(), hashes)
+        ]
+        passage_starts = np.flatnonzero(spans[:, 1] == 0).tolist()
+        if len(passages) != len(spans) or len(passage_starts) != len(documents):
+            raise ValueError("passages do not match the documents")
+        return passages, passage_starts
+
+    def load_lexical_index(self, passages):
+        return BM25Index.load(self.directory, passages)
+
+    def load_citation_index(self):
+        with open(self.directory / "citations.json", "r", encoding="utf-8") as f:
+            return CitationIndex.from_list(json.load(f))
+
+    def load_embeddings(self, model_name):
+        """Memory-mapped passage embeddings, None if absent or built with another model"""
+        embeddings = self.manifest.get("embeddings")
+        if not embeddings or embeddings["model"] != model_name:
+            return None
+        return np.load(self.directory / "embeddings.npy", mmap_mode="r")
+
+    def load_ann_index(self, passages, embeddings, nprobe=8, rerank=100):
+        """The IVF-PQ index trained at build time, None if the corpus was too small for one"""
+        if not self.manifest.get("ann"):
+            return None
+        return IVFPQIndex.load(self.directory / "ann", documents=passages, embeddings=embeddings,
+                               fingerprint=self.manifest["files"]["embeddings.npy"]["sha256"],
+                               nprobe=nprobe, rerank=rerank)
+
+
+def embed_passages(passages, texts, encoder, previous=None, previous_passages=()):
+    """Passage embeddings, copying rows of unchanged passages from a previous index
+
+    ``texts`` are the document_text of each passage's record, as chunked.
+    """
+    dimension = encoder.get_sentence_embedding_dimension()
+    matrix = np.empty((len(passages), dimension), dtype=np.float32)
+    previous_embeddings = previous.load_embeddings(encoder.name) if previous is not None else None
+    cached_rows = {}
+    if previous_embeddings is not None and previous_embeddings.shape[1] == dimension:
+        cached_rows = {passage.content_hash: row for row, passage in enumerate(previous_passages)}
+
+    missing = []
+    for row, passage in enumerate(passages):
+        cached_row = cached_rows.get(passage.content_hash)
+        if cached_row is None:
+            missing.append(row)
+        else:
+            matrix[row] = previous_embeddings[cached_row]
+    if missing:
+        matrix[missing] = encode_texts(encoder, [texts[row] for row in missing])
+    print(f"✅ Embeddings: reused {len(passages) - len(missing)}, encoded {len(missing)}")
+    return matrix
+
+
+def build_index(kb_path, output, encoder=None, passage_words=200, passage_overlap=50,
+                ann_min_documents=50000, previous=None):
+    """Build an index for a knowledge base under ``output`` and point LATEST at it
+
+    The version is a hash of the files written, so the same inputs always
+    produce the same directory. With a ``previous`` IndexArtifact the build
+    is incremental: unchanged passages (same id and content hash) reuse
+    their term frequencies and embeddings. Returns the version directory.
+    """
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+
+    previous_passages, previous_lexical = [], None
+    if previous is not None:
+        previous_store = previous.load_documents()
+        previous_passages, _ = previous.load_passages(previous_store.documents)
+        previous_lexical = previous.load_lexical_index(previous_passages)
+        # Reuse only needs passage ids and hashes, never the old content
+        previous_store.close()
+
+    passages, passage_starts, texts = [], [], []
+    lexical_index = BM25Index(previous_lexical)
+
+    def index_document(document, record=None):
+        doc_id = len(passage_starts)
+        passage_starts.append(len(passages))
+        for passage, passage_record in chunk_document(document, doc_id, record, passage_words, passage_overlap):
+            passages.append(passage)
+            texts.append(document_text(passage_record))
+            lexical_index.add_document(passage, passage_record)
+
+    store = DocumentStore.open(kb_path, on_document=index_document)
+    lexical_index.finalize()
+    print(f"✅ Indexed {len(store.documents)} documents ({len(passages)} passages, "
+          f"re-tokenized {lexical_index.tokenized}, reused {lexical_index.reused})")
+
+    # Staged next to the target so publishing is a rename
+    staging = Path(tempfile.mkdtemp(prefix=".build-", dir=output))
+    try:
+        entries = write_documents(store.documents, staging / "documents.jsonl")
+        with open(staging / "documents.json", "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False, separators=(",", ":"))
+        spans = np.array([(p.doc_id, p.number, p.start, p.end) for p in passages], dtype=np.int64).reshape(-1, 4)
+        np.save(staging / "passages.npy", spans)
+        (staging / "passage_hashes.txt").write_text("\n".join(p.content_hash for p in passages), encoding="ascii")
+        lexical_index.save(staging)
+        with open(staging / "citations.json", "w", encoding="utf-8") as f:
+            json.dump(CitationIndex.build(store.documents).to_list(), f, ensure_ascii=False, separators=(",", ":"))
+
+        embeddings_info, has_ann = None, False
+        if encoder is not None:
+            embeddings = embed_passages(passages, texts, encoder, previous, previous_passages)
+            np.save(staging / "embeddings.npy", embeddings)
+            embeddings_info = {"model": encoder.name, "backend": encoder.backend, "dimension": int(embeddings.shape[1])}
+            if len(passages) >= ann_min_documents:
+                ann_index = IVFPQIndex.build(embeddings, passages)
+                ann_index.save(staging / "ann", fingerprint=file_checksum(staging / "embeddings.npy"))
+                has_ann = True
+                print(f"✅ ANN index trained ({ann_index.n_lists} lists)")
+
+        files = {
+            path.relative_to(staging).as_posix(): {"bytes": path.stat().st_size, "sha256": file_checksum(path)}
+            for path in sorted(staging.rglob("*")) if path.is_file()
+        }
+        version = hashlib.sha256(json.dumps([SCHEMA_VERSION, files], sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        manifest = {
+            "schema_version": SCHEMA_VERSION,
+            "version": version,
+            "source": {"name": Path(kb_path).name, "sha256": file_checksum(kb_path)},
+            "metadata": store.metadata,
+            "documents": len(store.documents),
+            "passages": len(passages),
+            "passage_words": passage_words,
+            "passage_overlap": passage_overlap,
+            "embeddings": embeddings_info,
+            "ann": has_ann,
+            "files": files,
+        }
+        with open(staging / MANIFEST, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+
+        # mkdtemp creates the directory private to the builder
+        staging.chmod(0o755)
+        target = output / version
+        if target.exists():
+            print(f"✅ Index {version} is already built")
+            shutil.rmtree(staging)
+        else:
+            os.replace(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    finally:
+        store.close()
+
+    pointer_tmp = output / f"{LATEST}.tmp"
+    pointer_tmp.write_text(version + "\n", encoding="utf-8")
+    os.replace(pointer_tmp, output / LATEST)
+    return target
+
+
+def main():
+    """Build or verify a prebuilt LAW-GPT index directory"""
+    from config import LawGPTConfig
+    from encoders import load_encoder
+    from high_accuracy_law_gpt import EMBEDDING_MODEL_NAME
+
+    here = Path(__file__).parent
+    config = LawGPTConfig.from_env()
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="build a new index version and point LATEST at it")
+    build.add_argument("--knowledge-base", default=config.knowledge_base or find_knowledge_base(here))
+    build.add_argument("--output", default=config.index_dir or here / "index")
+    build.add_argument("--backend", default=config.embedding_backend, help="encoder for the embedding matrix")
+    build.add_argument("--no-embeddings", action="store_true", help="lexical and citation indexes only")
+    build.add_argument("--full", action="store_true", help="ignore the previous version instead of reusing it")
+
+    verify = commands.add_parser("verify", help="check an index directory against its manifest checksums")
+    verify.add_argument("path", nargs="?", default=config.index_dir or here / "index")
+    args = parser.parse_args()
+
+    if args.command == "verify":
+        try:
+            artifact = IndexArtifact.open(args.path, verify_checksums=True)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Index is not valid: {e}")
+            return 1
+        print(f"✅ Index {artifact.version} verified ({len(artifact.manifest['files'])} files)")
+        return 0
+
+    previous = None
+    if not args.full:
+        try:
+            previous = IndexArtifact.open(args.output)
+        except (OSError, ValueError, KeyError):
+            previous = None
+
+    encoder = None
+    if not args.no_embeddings:
+        try:
+            model_dir = config.model_dir or here / "models"
+            encoder = load_encoder(args.backend, EMBEDDING_MODEL_NAME, model_dir)
+        except Exception as e:
+            print(f"⚠️ Encoder not available, building without embeddings: {e}")
+
+    target = build_index(args.knowledge_base, args.output, encoder, config.passage_words, config.passage_overlap,
+                         config.ann_min_documents, previous)
+    print(f"✅ Index {target.name} is live in {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+LAW-GPT 2.0 - Lexical Index
+BM25F ranking over an inverted index of the knowledge base fields
+"""
+
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import numpy as np
+
+from ranking import select_top_k
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# BM25F parameters: field order, boosts and length normalization
+FIELDS = ("keywords", "title", "content")
+FIELD_WEIGHTS = np.array([3.0, 2.0, 1.0], dtype=np.float32)
+FIELD_B = np.array([0.3, 0.5, 0.75], dtype=np.float32)
+K1 = 1.2
+# Arrays written by BM25Index.save, memory-mapped by BM25Index.load
+SAVED_ARRAYS = ("idf", "offsets", "postings_doc", "postings_tf", "postings_weight", "field_lengths")
+
+
+def tokenize(text):
+    """Lowercase text and split it into alphanumeric terms"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def document_fields(doc):
+    """Return the tokenized keywords, title and content of a document"""
+    return (
+        tokenize(" ".join(doc.get("keywords", []))),
+        tokenize(doc.get("title", "")),
+        tokenize(doc.get("content", "")),
+    )
+
+
+class BM25Index:
+    """Inverted index with precomputed BM25F weights stored as flat arrays"""
+
+    def __init__(self, previous=None):
+        self.documents = []
+        self.terms = []
+        self.vocabulary = {}
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.postings_doc = np.zeros(0, dtype=np.int32)
+        self.postings_tf = np.zeros((0, len(FIELDS)), dtype=np.uint32)
+        self.postings_weight = np.zeros(0, dtype=np.float32)
+        self.field_lengths = np.zeros((0, len(FIELDS)), dtype=np.float32)
+        # Raw per-field term frequencies, only kept until finalize()
+        self._pending = defaultdict(list)
+        self._pending_lengths = []
+        # Unchanged documents (same id and content hash) are copied from the
+        # previous index instead of being tokenized again
+        self._previous = previous
+        self._previous_ids = {}
+        if previous is not None:
+            self._previous_ids = {
+                doc.get("id"): (doc_id, doc.get("content_hash"))
+                for doc_id, doc in enumerate(previous.documents)
+                if doc.get("id") is not None
+            }
+        self._doc_order = None
+        self.reused = 0
+        self.tokenized = 0
+
+    def add_document(self, doc, record=None):
+        """Tokenize a document once and queue its term frequencies
+
+        ``record`` is the raw record to tokenize when ``doc`` is a compact
+        document whose content lives on disk.
+        """
+        previous_entry = self._previous_ids.get(doc.get("id"))
+        if previous_entry is not None and previous_entry[1] and previous_entry[1] == doc.get("content_hash"):
+            frequencies, lengths = self._previous.document_frequencies(previous_entry[0])
+            self.reused += 1
+            return self._queue(doc, frequencies, lengths)
+
+        fields = document_fields(record if record is not None else doc)
+        frequencies = defaultdict(lambda: [0] * len(FIELDS))
+        for field_id, terms in enumerate(fields):
+            for term, count in Counter(terms).items():
+                frequencies[term][field_id] = count
+        self.tokenized += 1
+        return self._queue(doc, frequencies.items(), [len(terms) for terms in fields])
+
+    def _queue(self, doc, frequencies, lengths):
+        doc_id = len(self.documents)
+        self.documents.append(doc)
+        self._pending_lengths.append(lengths)
+        for term, tf in frequencies:
+            self._pending[term].append((doc_id, tf))
+        return doc_id
+
+    def document_frequencies(self, doc_id):
+        """(term, per-field tf) pairs and field lengths of an indexed document"""
+        if self._doc_order is None:
+            # Doc-major view of the postings, built once on first use
+            order = np.argsort(self.postings_doc, kind="stable")
+            doc_offsets = np.zeros(len(self.documents) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.postings_doc, minlength=len(self.documents)), out=doc_offsets[1:])
+            posting_terms = np.repeat(np.arange(len(self.terms)), np.diff(self.offsets))
+            self._doc_order = (order, doc_offsets, posting_terms)
+
+        order, doc_offsets, posting_terms = self._doc_order
+        positions = order[doc_offsets[doc_id]:doc_offsets[doc_id + 1]]
+        frequencies = [
+            (self.terms[term_id], tf)
+            for term_id, tf in zip(posting_terms[positions].tolist(), self.postings_tf[positions].tolist())
+        ]
+        return frequencies, self.field_lengths[doc_id].astype(int).tolist()
+
+    def finalize(self):
+        """Compute lengths, IDF and per-posting BM25F weights"""
+        n_docs = len(self.documents)
+        self.field_lengths = np.array(self._pending_lengths, dtype=np.float32).reshape(n_docs, len(FIELDS))
+        average_lengths = np.maximum(self.field_lengths.mean(axis=0) if n_docs else 1.0, 1.0)
+        # Per-document, per-field length normalization denominators
+        norms = 1.0 - FIELD_B + FIELD_B * self.field_lengths / average_lengths
+
+        terms = sorted(self._pending)
+        self.terms = terms
+        self.vocabulary = {term: term_id for term_id, term in enumerate(terms)}
+
+        counts = np.array([len(self._pending[term]) for term in terms], dtype=np.int64)
+        self.offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.offsets[1:])
+
+        nnz = int(self.offsets[-1])
+        self.postings_doc = np.empty(nnz, dtype=np.int32)
+        tf = np.empty((nnz, len(FIELDS)), dtype=np.uint32)
+        position = 0
+        for term in terms:
+            for doc_id, field_tf in self._pending[term]:
+                self.postings_doc[position] = doc_id
+                tf[position] = field_tf
+                position += 1
+
+        df = counts.astype(np.float32)
+        self.idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        self.postings_tf = tf
+        pseudo_tf = (FIELD_WEIGHTS * tf / norms[self.postings_doc]).sum(axis=1) if nnz else np.zeros(0, dtype=np.float32)
+        term_idf = np.repeat(self.idf, counts)
+        self.postings_weight = (term_idf * pseudo_tf / (K1 + pseudo_tf)).astype(np.float32)
+
+        self._pending = defaultdict(list)
+        self._pending_lengths = []
+        self._previous = None
+        self._previous_ids = {}
+        return self
+
+    @classmethod
+    def build(cls, documents):
+        """Build an index from a list of knowledge base documents"""
+        index = cls()
+        for doc in documents:
+            index.add_document(doc)
+        return index.finalize()
+
+    def save(self, directory):
+        """Write a finalized index as .npy arrays plus its vocabulary, one term per line"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in SAVED_ARRAYS:
+            np.save(directory / f"lexical_{name}.npy", np.ascontiguousarray(getattr(self, name)))
+        # Terms are [a-z0-9]+, so newlines cannot appear inside one
+        (directory / "lexical_terms.txt").write_bytes("\n".join(self.terms).encode("utf-8"))
+
+    @classmethod
+    def load(cls, directory, documents):
+        """Memory-map a saved index; ``documents`` are the indexed units, in order"""
+        directory = Path(directory)
+        index = cls()
+        for name in SAVED_ARRAYS:
+            setattr(index, name, np.load(directory / f"lexical_{name}.npy", mmap_mode="r"))
+        text = (directory / "lexical_terms.txt").read_bytes().decode("utf-8")
+        index.terms = text.split("\n") if text else []
+        index.vocabulary = {term: term_id for term_id, term in enumerate(index.terms)}
+        index.documents = documents
+        if len(index.terms) + 1 != len(index.offsets) or len(documents) != len(index.field_lengths):
+            raise ValueError("lexical index does not match its vocabulary or documents")
+        return index
+
+    def query_terms(self, query):
+        """Map a query to the ids of its distinct known terms"""
+        term_ids = {self.vocabulary[term] for term in tokenize(query) if term in self.vocabulary}
+        return np.array(sorted(term_ids), dtype=np.int64)
+
+    def max_score(self, query):
+        """Upper bound of the BM25F score for a query (sum of term IDFs)"""
+        return float(self.idf[self.query_terms(query)].sum())
+
+    def score(self, query, allowed=None):
+        """Return (doc_ids, scores) for every document matching a query term
+
+        ``allowed`` is an optional boolean mask over documents; postings of
+        other documents are dropped before any scores are accumulated.
+        """
+        term_ids = self.query_terms(query)
+        if len(term_ids) == 0:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+
+        slices = [slice(self.offsets[t], self.offsets[t + 1]) for t in term_ids]
+        doc_ids = np.concatenate([self.postings_doc[s] for s in slices])
+        weights = np.concatenate([self.postings_weight[s] for s in slices])
+        if allowed is not None:
+            keep = allowed[doc_ids]
+            doc_ids, weights = doc_ids[keep], weights[keep]
+
+        matched, inverse = np.unique(doc_ids, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights).astype(np.float32)
+        return matched, scores
+
+    def search(self, query, top_k=3):
+        """Return the top (document, score) pairs for a query"""
+        doc_ids, scores = select_top_k(*self.score(query), top_k)
+        return [(self.documents[doc_id], float(score)) for doc_id, score in zip(doc_ids, scores)]
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+LAW-GPT 2.0 - Passages
+Overlapping passages of long documents, with character offsets back to the parent
+"""
+
+import re
+
+from dense_index import document_text
+from embedding_cache import content_hash
+
+WORD_PATTERN = re.compile(r"\S+")
+# Passages below this fraction of their document's best confidence are not shown
+MIN_RELATIVE_CONFIDENCE = 0.5
+
+
+def split_passages(content, size=200, overlap=50):
+    """(start, end) character offsets of overlapping windows of ``size`` words"""
+    words = [match.span() for match in WORD_PATTERN.finditer(content)]
+    if len(words) <= size:
+        # Short documents stay whole, so their text and hashes are unchanged
+        return [(0, len(content))]
+
+    step = max(size - overlap, 1)
+    spans = []
+    for first in range(0, len(words), step):
+        last = min(first + size, len(words))
+        spans.append((words[first][0], words[last - 1][1]))
+        if last == len(words):
+            break
+    return spans
+
+
+class Passage:
+    """A window of a document's content; title and keywords come from the parent"""
+
+    __slots__ = ("document", "doc_id", "number", "start", "end", "id", "content_hash")
+    FIELDS = ("id", "title", "content", "keywords", "accuracy_score", "content_hash")
+
+    def __init__(self, document, doc_id, number, start, end, record=None, digest=None):
+        self.document = document
+        # Position of the parent in the knowledge base
+        self.doc_id = doc_id
+        self.number = number
+        self.start = start
+        self.end = end
+        parent_id = document.get("id")
+        self.id = None if parent_id is None else f"{parent_id}#{number}"
+        # Prebuilt indexes store the hash instead of the passage record
+        self.content_hash = digest or content_hash(record)
+
+    @property
+    def title(self):
+        return self.document.get("title", "")
+
+    @property
+    def keywords(self):
+        return self.document.get("keywords", ())
+
+    @property
+    def accuracy_score(self):
+        return self.document.get("accuracy_score")
+
+    @property
+    def content(self):
+        return self.document.get("content", "")[self.start:self.end]
+
+    def get(self, key, default=None):
+        """dict-style access, like Document"""
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        return default
+
+
+def chunk_document(document, doc_id, record=None, size=200, overlap=50):
+    """Yield (passage, passage record) pairs covering a document
+
+    ``record`` is the raw record when ``document`` keeps its content on disk;
+    passage records hold the text the indexes tokenize and embed.
+    """
+    record = record if record is not None else document
+    content = record.get("content", "")
+    for number, (start, end) in enumerate(split_passages(content, size, overlap)):
+        passage_record = {
+            "title": record.get("title", ""),
+            "keywords": record.get("keywords", []),
+            "content": content[start:end],
+        }
+        yield Passage(document, doc_id, number, start, end, passage_record), passage_record
+
+
+def passage_texts(passages):
+    """Embedding text of each passage, reading every parent's content once
+
+    For passages restored without their records; freshly chunked passages
+    keep the text of their passage record instead.
+    """
+    texts, parent, content = [], None, ""
+    for passage in passages:
+        if passage.document is not parent:
+            parent = passage.document
+            content = parent.get("content", "")
+        texts.append(document_text({
+            "title": passage.title,
+            "keywords": passage.keywords,
+            "content": content[passage.start:passage.end],
+        }))
+    return texts
+
+
+def aggregate_passages(candidates, top_k, method="max"):
+    """Group best-first passage candidates into document candidates
+
+    A document scores as its best passage ("max") or the total of its
+    matching passages ("sum"). Its passages are kept best first, dropping
+    those that only matched on the shared title and keywords.
+    """
+    groups = {}
+    for candidate in candidates:
+        passage = candidate["doc"]
+        group = groups.get(passage.doc_id)
+        if group is None:
+            group = groups[passage.doc_id] = dict(candidate, doc_id=passage.doc_id, doc=passage.document, passages=[])
+        elif method == "sum":
+            group["score"] += candidate["score"]
+        group["confidence"] = max(group["confidence"], candidate["confidence"])
+        group["passages"].append((passage, candidate["confidence"]))
+
+    documents = sorted(groups.values(), key=lambda group: (-group["score"], group["doc_id"]))[:top_k]
+    for group in documents:
+        floor = MIN_RELATIVE_CONFIDENCE * group["confidence"]
+        group["passages"] = [
+            passage for rank, (passage, confidence) in enumerate(group["passages"])
+            if rank == 0 or confidence >= floor
+        ]
+    return documents
+
+
+def best_documents(results, top_k):
+    """Collapse best-first (passage, score) results to (document, best score)"""
+    documents = {}
+    for passage, score in results:
+        if passage.doc_id not in documents:
+            documents[passage.doc_id] = (passage.document, score)
+    return list(documents.values())[:top_k]
+
+
+def passage_excerpt(passages, limit=2):
+    """Text of the best ``limit`` passages of one document, in document order
+
+    Overlapping passages are merged; gaps between them are marked with "…".
+    """
+    spans = sorted((passage.start, passage.end) for passage in passages[:limit])
+    merged = [list(spans[0])]
+    for start, end in spans[1:]:
+        if start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    content = passages[0].document.get("content", "")
+    excerpt = "\n\n…\n\n".join(content[start:end] for start, end in merged)
+    if content[:merged[0][0]].strip():
+        excerpt = "…" + excerpt
+    if content[merged[-1][1]:].strip():
+        excerpt += "…"
+    return excerpt
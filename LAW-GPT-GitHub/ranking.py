@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+LAW-GPT 2.0 - Ranking Helpers
+Shared top-k selection for the retrieval indexes
+"""
+
+import numpy as np
+
+
+def select_top_k(doc_ids, scores, k):
+    """Return (doc_ids, scores) of the k best hits, highest score first
+
+    Ties are broken by ascending doc id so every index (and every shard of
+    an index) agrees on the same ordering.
+    """
+    doc_ids = np.asarray(doc_ids)
+    scores = np.asarray(scores)
+    if k <= 0 or len(scores) == 0:
+        return doc_ids[:0], scores[:0]
+    if len(scores) > k:
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        keep = np.flatnonzero(scores >= kth)
+        doc_ids, scores = doc_ids[keep], scores[keep]
+    order = np.lexsort((doc_ids, -scores))[:k]
+    return doc_ids[order], scores[order]
+
+
+def select_top_k_rows(scores, k):
+    """Row-wise select_top_k over a (queries x documents) score matrix"""
+    doc_ids = np.arange(scores.shape[1])
+    rows = [select_top_k(doc_ids, row, k) for row in scores]
+    return [ids for ids, _ in rows], [row_scores for _, row_scores in rows]
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+LAW-GPT 2.0 - Sharded Search
+Fan queries out to worker processes that each own a slice of the corpus
+"""
+
+import itertools
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+
+import numpy as np
+
+from ranking import select_top_k, select_top_k_rows
+
+
+def _shard_worker(conn, directory, start, end):
+    """Serve lexical and dense scoring for documents [start, end)"""
+    directory = Path(directory)
+    # Memory-mapped: every worker shares the same pages of the OS cache
+    offsets = np.load(directory / "offsets.npy", mmap_mode="r")
+    postings_doc = np.load(directory / "postings_doc.npy", mmap_mode="r")
+    postings_weight = np.load(directory / "postings_weight.npy", mmap_mode="r")
+    embeddings = None
+    if (directory / "embeddings.path").exists():
+        embeddings_path = (directory / "embeddings.path").read_text(encoding="utf-8")
+        embeddings = np.load(embeddings_path, mmap_mode="r")[start:end]
+
+    while True:
+        # Requests are tagged with an id so the parent can match replies to callers
+        request_id, request = conn.recv()
+        kind = request[0]
+        if kind == "stop":
+            break
+
+        if kind == "lexical":
+            doc_chunks, weight_chunks = [], []
+            for term_id in request[1]:
+                term_docs = postings_doc[offsets[term_id]:offsets[term_id + 1]]
+                # Postings are in doc order, so the shard's range is contiguous
+                lo, hi = np.searchsorted(term_docs, [start, end])
+                doc_chunks.append(term_docs[lo:hi])
+                weight_chunks.append(postings_weight[offsets[term_id] + lo:offsets[term_id] + hi])
+            doc_ids = np.concatenate(doc_chunks) if doc_chunks else np.zeros(0, dtype=np.int32)
+            weights = np.concatenate(weight_chunks) if weight_chunks else np.zeros(0, dtype=np.float32)
+            if len(request) > 2:
+                # Packed filter mask over [start, end): drop postings before scoring, as BM25Index.score does
+                keep = np.unpackbits(request[2], count=end - start).astype(bool)[doc_ids - start]
+                doc_ids, weights = doc_ids[keep], weights[keep]
+            matched, inverse = np.unique(doc_ids, return_inverse=True)
+            conn.send((request_id, (matched, np.bincount(inverse, weights=weights).astype(np.float32))))
+
+        elif kind == "dense":
+            query_vectors, top_k = request[1], request[2]
+            if len(query_vectors) == 1:
+                scores = (embeddings @ query_vectors[0])[None, :]
+            else:
+                scores = query_vectors @ embeddings.T
+            ids, row_scores = select_top_k_rows(scores, top_k)
+            conn.send((request_id, ([row_ids + start for row_ids in ids], row_scores)))
+
+
+class ShardPool:
+    """Worker processes, each owning a contiguous range of document ids"""
+
+    def __init__(self, lexical_index, dense_index=None, processes=None, directory=None):
+        processes = processes or os.cpu_count() or 1
+        n_docs = len(lexical_index.documents)
+        self.lexical_index = lexical_index
+        self.dense_index = dense_index
+        self._owns_directory = directory is None
+        self.directory = Path(directory or tempfile.mkdtemp(prefix="lawgpt-shards-"))
+        self._lock = threading.Lock()
+        # Signalled whenever a fan-out finishes, so close() can wait for them
+        self._idle = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._ids = itertools.count()
+        self.closed = False
+
+        self.export(lexical_index, dense_index)
+        bounds = np.linspace(0, n_docs, max(1, min(processes, n_docs)) + 1).astype(int)
+        self.ranges = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+        self.connections = []
+        self.workers = []
+        # Per shard: a send lock and the replies still awaited, by request id
+        self._send_locks = []
+        self._pending = []
+        self._receivers = []
+        for start, end in self.ranges:
+            parent_conn, child_conn = multiprocessing.Pipe()
+            worker = multiprocessing.Process(
+                target=_shard_worker, args=(child_conn, str(self.directory), start, end),
+                name=f"lawgpt-shard-{start}-{end}", daemon=True,
+            )
+            worker.start()
+            child_conn.close()
+            self.connections.append(parent_conn)
+            self.workers.append(worker)
+            self._send_locks.append(threading.Lock())
+            self._pending.append({})
+
+        for shard, conn in enumerate(self.connections):
+            receiver = threading.Thread(target=self._receive, args=(shard, conn),
+                                        name=f"lawgpt-shard-receiver-{shard}", daemon=True)
+            receiver.start()
+            self._receivers.append(receiver)
+
+    def export(self, lexical_index, dense_index):
+        """Write index arrays as .npy files the workers can memory-map"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for name in ("offsets", "postings_doc", "postings_weight"):
+            np.save(self.directory / f"{name}.npy", getattr(lexical_index, name))
+
+        if dense_index is not None:
+            embeddings = dense_index.embeddings
+            embeddings_path = getattr(embeddings, "filename", None)
+            if embeddings_path is None:
+                embeddings_path = self.directory / "embeddings.npy"
+                np.save(embeddings_path, np.asarray(embeddings, dtype=np.float32))
+            (self.directory / "embeddings.path").write_text(str(embeddings_path), encoding="utf-8")
+
+    def _receive(self, shard, conn):
+        """Hand each reply from one shard to the caller waiting for it"""
+        while True:
+            try:
+                request_id, reply = conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                future = self._pending[shard].pop(request_id, None)
+            if future is not None:
+                future.set_result(reply)
+        # The worker is gone: nothing more will arrive for the requests still waiting
+        with self._lock:
+            pending, self._pending[shard] = self._pending[shard], {}
+        for future in pending.values():
+            future.set_exception(EOFError(f"shard {shard} stopped"))
+
+    def fan_out(self, request=None, requests=None):
+        """Send one request to every shard and collect the replies in shard order
+
+        ``requests`` gives each shard its own request instead. Returns None once the pool is closing (or a worker died), so callers
+        answer in-process instead. Fan-outs from several threads are in
+        flight together; each worker serves its queue in order.
+        """
+        with self._lock:
+            if self.closed:
+                return None
+            request_id = next(self._ids)
+            futures = [Future() for _ in self.connections]
+            for pending, future in zip(self._pending, futures):
+                pending[request_id] = future
+            self._in_flight += 1
+        try:
+            requests = requests or [request] * len(self.connections)
+            for conn, send_lock, shard_request in zip(self.connections, self._send_locks, requests):
+                with send_lock:
+                    conn.send((request_id, shard_request))
+            return [future.result() for future in futures]
+        except (OSError, EOFError):
+            return None
+        finally:
+            with self._lock:
+                for pending in self._pending:
+                    pending.pop(request_id, None)
+                self._in_flight -= 1
+                self._idle.notify_all()
+
+    def close(self):
+        """Stop the workers once in-flight requests have finished"""
+        with self._lock:
+            if self.closed:
+                return
+            # Later fan_out calls return None and fall back in-process
+            self.closed = True
+            self._idle.wait_for(lambda: self._in_flight == 0, timeout=30)
+        for conn, send_lock in zip(self.connections, self._send_locks):
+            try:
+                with send_lock:
+                    conn.send((None, ("stop",)))
+            except (OSError, EOFError):
+                pass
+        for worker in self.workers:
+            worker.join(timeout=5)
+        for receiver in self._receivers:
+            receiver.join(timeout=5)
+        for conn in self.connections:
+            conn.close()
+        if self._owns_directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class ShardedLexicalIndex:
+    """BM25Index interface backed by a ShardPool"""
+
+    def __init__(self, lexical_index, pool):
+        self.index = lexical_index
+        self.pool = pool
+        self.documents = lexical_index.documents
+
+    def max_score(self, query):
+        return self.index.max_score(query)
+
+    def score(self, query, allowed=None):
+        """Identical to BM25Index.score, computed shard by shard
+
+        With an ``allowed`` mask each shard receives its packed slice and
+        only scores the allowed postings.
+        """
+        term_ids = self.index.query_terms(query)
+        if len(term_ids) == 0:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        if allowed is None:
+            replies = self.pool.fan_out(("lexical", term_ids))
+        else:
+            replies = self.pool.fan_out(requests=[
+                ("lexical", term_ids, np.packbits(allowed[start:end])) for start, end in self.pool.ranges
+            ])
+        if replies is None:
+            # Pool retired by a reload while this query was running
+            return self.index.score(query, allowed)
+        # Shards cover ascending id ranges, so concatenation stays sorted
+        doc_ids = np.concatenate([ids for ids, _ in replies])
+        scores = np.concatenate([scores for _, scores in replies])
+        return doc_ids, scores
+
+    def search(self, query, top_k=3):
+        doc_ids, scores = select_top_k(*self.score(query), top_k)
+        return [(self.documents[doc_id], float(score)) for doc_id, score in zip(doc_ids, scores)]
+
+
+class ShardedDenseIndex:
+    """DenseIndex interface backed by a ShardPool"""
+
+    def __init__(self, dense_index, pool):
+        self.index = dense_index
+        self.pool = pool
+        self.documents = dense_index.documents
+        self.embeddings = dense_index.embeddings
+
+    def search_ids_batch(self, query_vectors, top_k=3):
+        replies = self.pool.fan_out(("dense", np.asarray(query_vectors, dtype=np.float32), top_k))
+        if replies is None:
+            return self.index.search_ids_batch(query_vectors, top_k)
+        merged = [
+            select_top_k(
+                np.concatenate([ids[row] for ids, _ in replies]),
+                np.concatenate([scores[row] for _, scores in replies]),
+                top_k,
+            )
+            for row in range(len(query_vectors))
+        ]
+        return [ids for ids, _ in merged], [scores for _, scores in merged]
+
+    def search_ids(self, query_vector, top_k=3):
+        ids, scores = self.search_ids_batch(query_vector[None, :], top_k)
+        return ids[0], scores[0]
+
+    def score_ids(self, query_vector, doc_ids):
+        return self.index.score_ids(query_vector, doc_ids)
+
+    def search(self, query_vector, top_k=3):
+        doc_ids, scores = self.search_ids(query_vector, top_k)
+        return [(self.documents[doc_id], float(score)) for doc_id, score in zip(doc_ids, scores)]
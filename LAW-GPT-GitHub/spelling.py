@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+LAW-GPT 2.0 - Spelling
+Typo-tolerant query terms from a symmetric-delete (SymSpell) dictionary of the index vocabulary
+"""
+
+import numpy as np
+
+from lexical_index import tokenize
+
+# Words shorter than this are left alone ("fir", "ipc" are real terms, not typos)
+MIN_TERM_LENGTH = 4
+# Only deletes within this prefix are stored, bounding memory for long words
+PREFIX_LENGTH = 7
+# Question words that are not in the index but should not be "corrected" into it
+FUNCTION_WORDS = frozenset("""
+    about after against also been before being between both can could does doing during each
+    from have having here into just more most much only other over same should some such than
+    that their them then there these they this those through under until very what when where
+    which while with would your
+""".split())
+
+
+def deletes(term, max_distance, prefix_length=PREFIX_LENGTH):
+    """Every string reachable from term's prefix by up to max_distance deletions"""
+    found = {term[:prefix_length]}
+    frontier = [term[:prefix_length]]
+    for _ in range(max_distance):
+        next_frontier = []
+        for word in frontier:
+            if len(word) <= 1:
+                continue
+            for i in range(len(word)):
+                variant = word[:i] + word[i + 1:]
+                if variant not in found:
+                    found.add(variant)
+                    next_frontier.append(variant)
+        frontier = next_frontier
+    return found
+
+
+def edit_distance(a, b, max_distance):
+    """Optimal string alignment distance, or max_distance + 1 if it is larger"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                # Adjacent transposition ("cheuqe" -> "cheque")
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class SymSpell:
+    """Precomputed deletes of every indexed term, for corrections without a vocabulary scan"""
+
+    def __init__(self, max_distance=2, max_candidates=3):
+        self.max_distance = max_distance
+        self.max_candidates = max_candidates
+        self.frequencies = {}
+        # delete string -> terms that produce it
+        self.deletes = {}
+
+    @classmethod
+    def from_index(cls, lexical_index, max_distance=2, max_candidates=3):
+        """Dictionary of a BM25Index's terms, weighted by document frequency"""
+        spelling = cls(max_distance, max_candidates)
+        document_frequencies = np.diff(lexical_index.offsets).tolist()
+        for term, frequency in zip(lexical_index.terms, document_frequencies):
+            spelling.add_term(term, frequency)
+        return spelling
+
+    def add_term(self, term, frequency=1):
+        if len(term) < MIN_TERM_LENGTH - self.max_distance or term.isdigit():
+            return
+        self.frequencies[term] = self.frequencies.get(term, 0) + frequency
+        for variant in deletes(term, self.max_distance):
+            self.deletes.setdefault(variant, []).append(term)
+
+    def __len__(self):
+        return len(self.frequencies)
+
+    def lookup(self, term):
+        """Closest known terms, best first: nearest edit distance, then most frequent"""
+        if term in self.frequencies or len(term) < MIN_TERM_LENGTH or term.isdigit() or term in FUNCTION_WORDS:
+            return []
+        # Short words tolerate a single edit; two edits would match unrelated words
+        max_distance = min(self.max_distance, max(1, (len(term) - 2) // 3))
+
+        candidates = {}
+        for variant in deletes(term, max_distance):
+            for known in self.deletes.get(variant, ()):
+                if known not in candidates:
+                    candidates[known] = edit_distance(term, known, max_distance)
+
+        matches = sorted(
+            (distance, -self.frequencies[known], known)
+            for known, distance in candidates.items() if distance <= max_distance
+        )
+        if not matches:
+            return []
+        # Only the nearest candidates are worth expanding with
+        best = matches[0][0]
+        return [known for distance, _, known in matches if distance == best][:self.max_candidates]
+
+    def corrections(self, query):
+        """{misspelled term: [replacement terms]} for a query"""
+        found = {}
+        for term in tokenize(query):
+            if term not in found:
+                replacements = self.lookup(term)
+                if replacements:
+                    found[term] = replacements
+        return found
+
+    def expand(self, query):
+        """Query text with the corrections of unknown terms appended"""
+        corrections = self.corrections(query)
+        if not corrections:
+            return query
+        return query + " " + " ".join(term for replacements in corrections.values() for term in replacements)
@@ -0,0 +1,81 @@
+"""
+LAW-GPT 2.0 - Shared engine tests
+N sessions share one engine, so the embedding model is loaded once per process
+"""
+
+import shutil
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+
+import high_accuracy_law_gpt
+from config import LawGPTConfig
+
+SESSIONS = 16
+
+
+class StubEncoder:
+    """Stands in for the sentence-transformers model; counts how often one is built"""
+
+    backend = "stub"
+    name = "stub"
+    instances = 0
+
+    def __init__(self):
+        StubEncoder.instances += 1
+
+    def get_sentence_embedding_dimension(self):
+        return 8
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        vectors = np.ones((len(texts), 8), dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def stubbed_engine(monkeypatch, tmp_path):
+    """Fresh process-wide engine slot and a stub encoder over a copy of the knowledge base"""
+    StubEncoder.instances = 0
+    monkeypatch.setattr(high_accuracy_law_gpt, "load_encoder", lambda *args: StubEncoder())
+    monkeypatch.setattr(high_accuracy_law_gpt, "_shared_engine", None)
+    # Embedding caches are written next to the knowledge base, so keep them out of the repo
+    kb_path = tmp_path / "knowledge_base.json"
+    shutil.copy(APP_DIR / "knowledge_base.json", kb_path)
+    config = LawGPTConfig(knowledge_base=str(kb_path), lazy_model=False, hot_reload=False)
+    yield config
+    engine = high_accuracy_law_gpt._shared_engine
+    if engine is not None:
+        engine.close()
+
+
+def test_sessions_share_one_engine_and_one_model(stubbed_engine):
+    barrier = threading.Barrier(SESSIONS)
+    engines = [None] * SESSIONS
+
+    def session(i):
+        # Every session asks for the engine at the same moment
+        barrier.wait()
+        engines[i] = high_accuracy_law_gpt.get_shared_engine(stubbed_engine)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(SESSIONS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(engine is engines[0] for engine in engines)
+    assert StubEncoder.instances == 1
+    assert engines[0].semantic_ready
+
+
+def test_later_sessions_reuse_the_engine(stubbed_engine):
+    first = high_accuracy_law_gpt.get_shared_engine(stubbed_engine)
+    for _ in range(SESSIONS):
+        assert high_accuracy_law_gpt.get_shared_engine() is first
+    assert StubEncoder.instances == 1
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+LAW-GPT 2.0 - Tracing and Metrics
+Per-stage query spans and process-level histograms in Prometheus text format
+"""
+
+import bisect
+import threading
+from time import perf_counter_ns
+
+# Seconds; covers cache hits (microseconds) up to cold embedding calls
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+COUNT_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000)
+
+
+class _Span:
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.stages[self.name] = self.trace.stages.get(self.name, 0) + perf_counter_ns() - self.start
+
+
+class _SharedSpan:
+    """Times one stage of a batch and charges every traced query an equal share"""
+
+    __slots__ = ("traces", "name", "start")
+
+    def __init__(self, traces, name):
+        self.traces = [trace for trace in traces if trace.enabled]
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        if self.traces:
+            share = (perf_counter_ns() - self.start) // len(self.traces)
+            for trace in self.traces:
+                trace.stages[self.name] = trace.stages.get(self.name, 0) + share
+
+
+def shared_span(traces, name):
+    """Context manager timing a stage done once for a batch of queries"""
+    return _SharedSpan(traces, name)
+
+
+class Trace:
+    """Stage durations (ns) and counts for one query"""
+
+    __slots__ = ("stages", "counts", "start")
+    enabled = True
+
+    def __init__(self):
+        self.stages = {}
+        self.counts = {}
+        self.start = perf_counter_ns()
+
+    def span(self, name):
+        """Context manager timing one stage; repeated stages accumulate"""
+        return _Span(self, name)
+
+    def count(self, name, value):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def breakdown(self):
+        """Per-query summary included in the result dict"""
+        return {
+            "total_ms": (perf_counter_ns() - self.start) / 1e6,
+            "stages_ms": {name: duration / 1e6 for name, duration in self.stages.items()},
+            **self.counts,
+        }
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _NullTrace:
+    """Stand-in when tracing is off: every call is a no-op"""
+
+    __slots__ = ()
+    enabled = False
+    _span = _NullSpan()
+
+    def span(self, name):
+        return self._span
+
+    def count(self, name, value):
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as Prometheus expects"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels=""):
+        separator = "," if labels else ""
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels}{separator}le="{bound:g}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels}{separator}le="+Inf"}} {self.count}'
+        suffix = f"{{{labels}}}" if labels else ""
+        yield f"{name}_sum{suffix} {self.sum:.9g}"
+        yield f"{name}_count{suffix} {self.count}"
+
+
+class QueryMetrics:
+    """Process-level query latency, stage latency and candidate histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.stages = {}
+        self.candidates = Histogram(COUNT_BUCKETS)
+
+    def observe(self, seconds, trace=NULL_TRACE):
+        """Record one answered query; stage data only exists when traced"""
+        with self._lock:
+            self.latency.observe(seconds)
+            if not trace.enabled:
+                return
+            for name, duration in trace.stages.items():
+                histogram = self.stages.get(name)
+                if histogram is None:
+                    histogram = self.stages[name] = Histogram(LATENCY_BUCKETS)
+                histogram.observe(duration / 1e9)
+            if "candidates_scored" in trace.counts:
+                self.candidates.observe(trace.counts["candidates_scored"])
+
+    def prometheus(self, cache_stats=None):
+        """Metrics in the Prometheus text exposition format"""
+        with self._lock:
+            lines = [
+                "# HELP lawgpt_query_latency_seconds Time to answer a query.",
+                "# TYPE lawgpt_query_latency_seconds histogram",
+                *self.latency.lines("lawgpt_query_latency_seconds"),
+            ]
+            if self.stages:
+                lines += [
+                    "# HELP lawgpt_stage_latency_seconds Time spent per query stage (traced queries only).",
+                    "# TYPE lawgpt_stage_latency_seconds histogram",
+                ]
+                for name in sorted(self.stages):
+                    lines += self.stages[name].lines("lawgpt_stage_latency_seconds", f'stage="{name}"')
+            if self.candidates.count:
+                lines += [
+                    "# HELP lawgpt_candidates_scored Passages scored per query (traced queries only).",
+                    "# TYPE lawgpt_candidates_scored histogram",
+                    *self.candidates.lines("lawgpt_candidates_scored"),
+                ]
+
+        if cache_stats is not None:
+            lines += [
+                "# HELP lawgpt_cache_hits_total Answer cache hits.",
+                "# TYPE lawgpt_cache_hits_total counter",
+                f"lawgpt_cache_hits_total {cache_stats['hits']}",
+                "# HELP lawgpt_cache_misses_total Answer cache misses.",
+                "# TYPE lawgpt_cache_misses_total counter",
+                f"lawgpt_cache_misses_total {cache_stats['misses']}",
+                "# HELP lawgpt_cache_hit_ratio Answer cache hits / lookups since start.",
+                "# TYPE lawgpt_cache_hit_ratio gauge",
+                f"lawgpt_cache_hit_ratio {cache_stats['hit_rate']:.6g}",
+            ]
+        return "\n".join(lines) + "\n"